@@ -1,3 +1,30 @@
 from django.contrib import admin
+from api.mail import OutboxService
+from api.models import IdempotencyKey, OutboxEmail
 
-# Register your models here.
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["id", "user", "status_code", "created_at", "locked_until"]
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "subject",
+        "to",
+        "status",
+        "attempts",
+        "created_at",
+        "sent_at",
+    ]
+    list_filter = ["status"]
+    search_fields = ["subject", "to"]
+    readonly_fields = ["attempts", "last_error", "created_at", "sent_at"]
+    actions = ["retry_emails"]
+
+    @admin.action(description="Retry selected dead-lettered emails")
+    def retry_emails(self, request, queryset):
+        retried = OutboxService.retry(queryset)
+        self.message_user(request, f"{retried} email(s) queued again.")
@@ -0,0 +1,141 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# ---> Columns needed to authenticate and authorize a request; the rest of the
+#      user row is deferred and only loaded if a view actually reads it
+USER_STATE_FIELDS = ("email", "is_active", "is_staff", "is_superuser")
+VERIFIED_TOKEN_CACHE_SIZE = getattr(settings, "AUTH_VERIFIED_TOKEN_CACHE_SIZE", 1024)
+
+
+def user_state_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def invalidate_user_state(*user_ids):
+    """Drop the cached auth state of users once the current transaction commits."""
+    keys = [user_state_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class VerifiedTokenCache:
+    """
+    Process-local LRU of verified tokens, keyed by the sha256 of the raw token.
+    Entries are dropped once the token's `exp` has passed, so a memoized token
+    is never accepted after it would have failed verification.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.tokens = OrderedDict()
+        self.lock = Lock()
+
+    @staticmethod
+    def key(raw_token):
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, raw_token):
+        key = self.key(raw_token)
+        with self.lock:
+            entry = self.tokens.get(key)
+            if entry is None:
+                return None
+            token, expires = entry
+            if expires <= time.time():
+                del self.tokens[key]
+                return None
+            self.tokens.move_to_end(key)
+            return token
+
+    def set(self, raw_token, token):
+        expires = token.payload.get("exp")
+        if expires is None:
+            return
+        key = self.key(raw_token)
+        with self.lock:
+            self.tokens[key] = (token, expires)
+            self.tokens.move_to_end(key)
+            while len(self.tokens) > self.size:
+                self.tokens.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache(VERIFIED_TOKEN_CACHE_SIZE)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a users_user SELECT on the hot path.
+     - Verified tokens are memoized per token hash, so the signature and
+       claim checks run once per token and process
+     - The user id comes from the token; is_active / is_staff come from a
+       short-lived cache of the user's auth state (AUTH_USER_CACHE_TIMEOUT)
+     - The state is invalidated when a user is saved, deleted or changed
+       with User.objects.update(), in the configured cache. Deactivation and
+       staff changes apply on the next request only with a shared cache
+       (CACHE_BACKEND); with the default per-process LocMemCache, and after
+       writes that bypass the ORM, other processes may keep the old state
+       for up to AUTH_USER_CACHE_TIMEOUT seconds
+     - The is_staff / is_active claims issued with the token are for
+       clients; a stale claim (e.g. staff revoked after the token was
+       issued) never overrides the cached state
+     - The database is read only when the state cache misses
+     - request.user is a real User with every other field deferred
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        state = self.get_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not state["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return self.build_user(user_id, state)
+
+    def get_user_state(self, user_id):
+        key = user_state_key(user_id)
+        state = cache.get(key)
+        if state is None:
+            state = (
+                self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*USER_STATE_FIELDS)
+                .first()
+            )
+            if state is None:
+                return None
+            cache.set(key, state, getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 60))
+        return state
+
+    def build_user(self, user_id, state):
+        User = self.user_model
+        loaded = {"id": User._meta.pk.to_python(user_id), **state}
+        field_names = [
+            field.attname
+            for field in User._meta.concrete_fields
+            if field.attname in loaded
+        ]
+        return User.from_db(
+            User.objects.db, field_names, [loaded[name] for name in field_names]
+        )
@@ -0,0 +1,366 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Min
+from django.test.utils import override_settings
+from django.urls import get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import urls as api_urls
+from order.models import Cart, Order, Wishlist
+from product.caching import bump_catalog_version
+from product.models import Category, Product, Review
+from users.models import User
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+# ---> Routes only staff may call; everything else runs as a regular customer
+STAFF_ROUTES = {"orders-export", "sales-list", "sales-totals"}
+
+# ---> Value of the `pk` URL kwarg for each basename's detail routes
+DETAIL_KEYS = {
+    "category": "category_pk",
+    "products": "product_pk",
+    "carts": "cart_pk",
+    "orders": "order_pk",
+    "wishlists": "wishlist_product_pk",
+    "product-review": "review_pk",
+    "product-images": "image_pk",
+    "product-stocks": "stock_pk",
+    "review-images": "review_image_pk",
+    "cart-item": "cart_item_pk",
+}
+
+# ---> Routes whose response grows with the whole table (no pagination by
+# ---> design); their query budget is checked but their latency isn't
+UNBOUNDED_ROUTES = {"orders-export"}
+
+# ---> A non-browser client address, so the debug toolbar stays out of the timings
+CLIENT_ADDRESS = "192.0.2.10"
+
+
+def api_routes():
+    """(url name, viewset, action) of every GET route registered in api.urls."""
+    routers = [
+        value
+        for value in vars(api_urls).values()
+        if hasattr(value, "registry") and hasattr(value, "get_routes")
+    ]
+    for router in routers:
+        for _, viewset, basename in router.registry:
+            for route in router.get_routes(viewset):
+                action = dict.get(route.mapping, "get")
+                if action and hasattr(viewset, action):
+                    yield route.name.format(basename=basename), viewset, action
+
+
+def route_params(name):
+    """URL kwargs the named route needs, read from the URL resolver."""
+    # ---> Skip the `.<format>` suffix patterns the DefaultRouter adds
+    for possibility in get_resolver().reverse_dict.getlist(name):
+        params = possibility[0][0][1]
+        if "format" not in params:
+            return params
+    return None
+
+
+def is_paginated(viewset, action):
+    pagination = getattr(viewset, "pagination_class", None)
+    return (
+        action == "list"
+        and pagination is not None
+        and getattr(pagination, "page_size_query_param", None)
+    )
+
+
+class Subjects:
+    """
+    Objects the routes are exercised against, at a "small" and a "large"
+    data size (e.g. the least and the most reviewed product). Both have at
+    least one child row so prefetches run in either case.
+    """
+
+    SIZES = ("small", "large")
+
+    def __init__(self):
+        self.contexts = {size: self.build(size) for size in self.SIZES}
+        self.staff = (
+            User.objects.filter(is_staff=True, is_active=True).order_by("pk").first()
+        )
+
+    def pick(self, queryset, count_field, size):
+        ordering = count_field if size == "small" else f"-{count_field}"
+        return (
+            queryset.filter(**{f"{count_field}__gt": 0})
+            .order_by(ordering, "pk")
+            .first()
+        )
+
+    def build(self, size):
+        product = self.pick(Product.objects.all(), "review_count", size)
+        category = self.pick(Category.objects.all(), "product_count", size)
+        review = (
+            self.pick(
+                Review.objects.filter(product=product).annotate(n=Count("images")),
+                "n",
+                size,
+            )
+            or Review.objects.filter(product=product).order_by("pk").first()
+        )
+        user = self.pick(
+            User.objects.filter(is_active=True, cart__items__isnull=False)
+            .annotate(n=Count("orders", distinct=True))
+            .distinct(),
+            "n",
+            size,
+        )
+        cart = Cart.objects.filter(user=user).first() if user else None
+        wishlist_product = (
+            Wishlist.products.through.objects.filter(wishlist__user=user)
+            .values_list("product_id", flat=True)
+            .first()
+        )
+        context = {
+            "user": user,
+            "product_pk": product and product.pk,
+            "category_pk": category and category.pk,
+            "review_pk": review and review.pk,
+            "cart_pk": cart and cart.pk,
+            "order_pk": Order.objects.filter(user=user)
+            .values_list("pk", flat=True)
+            .first(),
+            "wishlist_product_pk": wishlist_product,
+            "image_pk": product and product.images.values_list("pk", flat=True).first(),
+            "stock_pk": product and product.stocks.values_list("pk", flat=True).first(),
+            "review_image_pk": review
+            and review.images.values_list("pk", flat=True).first(),
+            "cart_item_pk": cart and cart.items.values_list("pk", flat=True).first(),
+        }
+        return context
+
+
+class APIBenchmark:
+    """
+    Walks every GET route of api.urls and records queries, DB time and wall
+    time per route.
+     - Each route runs against the "small" and "large" subjects and, when it
+       is page-size paginated, at every page size; the query count must be
+       the same in every run, otherwise the route has an N+1
+     - Timings are the median of `repeat` runs after one warm-up request
+     - The catalog response cache is invalidated before every request so
+       each run renders the response, unless `use_cache` is set; other
+       caches (auth state, wishlist ids) stay warm as in production
+    """
+
+    def __init__(
+        self,
+        page_sizes=(1, 10, 50),
+        repeat=5,
+        threshold=1.5,
+        slack_ms=5.0,
+        use_cache=False,
+        log=None,
+    ):
+        self.page_sizes = page_sizes
+        self.repeat = repeat
+        self.threshold = threshold
+        self.slack_ms = slack_ms
+        self.use_cache = use_cache
+        self.log = log or (lambda message: None)
+
+    def client(self, user):
+        client = APIClient(REMOTE_ADDR=CLIENT_ADDRESS)
+        if user is not None:
+            token = AccessToken.for_user(user)
+            client.credentials(HTTP_AUTHORIZATION=f"JWT {token}")
+        return client
+
+    def measure(self, client, url, params):
+        """Returns (status, queries, db_ms, wall_ms) for one route/params."""
+        self.reset_response_cache()
+        client.get(url, params)  # ---> warm-up
+        walls, dbs = [], []
+        for _ in range(self.repeat):
+            self.reset_response_cache()
+            timings = []
+
+            def timed(execute, sql, params, many, context):
+                started = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    timings.append(time.perf_counter() - started)
+
+            with connection.execute_wrapper(timed):
+                started = time.perf_counter()
+                response = client.get(url, params)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                walls.append((time.perf_counter() - started) * 1000)
+            dbs.append(sum(timings) * 1000)
+        return (
+            response.status_code,
+            len(timings),
+            statistics.median(dbs),
+            statistics.median(walls),
+        )
+
+    def reset_response_cache(self):
+        if not self.use_cache:
+            bump_catalog_version()
+
+    def run(self):
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            return self._run()
+
+    def _run(self):
+        subjects = Subjects()
+        results = {}
+        for name, viewset, action in api_routes():
+            params = route_params(name)
+            if params is None:
+                continue
+            staff = name in STAFF_ROUTES
+            page_sizes = self.page_sizes if is_paginated(viewset, action) else (None,)
+            runs = []
+            for size, context in subjects.contexts.items():
+                user = subjects.staff if staff else context["user"]
+                detail_key = DETAIL_KEYS.get(name.rsplit("-", 1)[0], "")
+                kwargs = {
+                    param: context.get(detail_key if param == "pk" else param)
+                    for param in params
+                }
+                if user is None or None in kwargs.values():
+                    continue
+                client = self.client(user)
+                url = reverse(name, kwargs=kwargs)
+                for page_size in page_sizes:
+                    query = {"page_size": page_size} if page_size else {}
+                    runs.append(
+                        (
+                            f"{size}/{page_size or '-'}",
+                            *self.measure(client, url, query),
+                        )
+                    )
+            if not runs:
+                self.log(f"{name}: skipped (no data to exercise it)")
+                continue
+            results[name] = self.summarize(name, runs)
+        return results
+
+    def summarize(self, name, runs):
+        counts = {label: queries for label, _, queries, _, _ in runs}
+        result = {
+            "queries": max(counts.values()),
+            "db_ms": round(max(run[3] for run in runs), 2),
+            "wall_ms": round(max(run[4] for run in runs), 2),
+            "errors": sorted(
+                {
+                    f"{label}: HTTP {status}"
+                    for label, status, *_ in runs
+                    if status >= 400
+                }
+            ),
+            "runs": counts,
+        }
+        if len(set(counts.values())) > 1:
+            result["errors"].append(
+                "query count depends on data / page size: "
+                + ", ".join(f"{label}={count}" for label, count in counts.items())
+            )
+        self.log(
+            f"{name}: {result['queries']} queries, {result['db_ms']:.1f} ms DB, "
+            f"{result['wall_ms']:.1f} ms wall"
+        )
+        return result
+
+    def compare(self, results, baseline, check_latency=True):
+        """
+        Return a list of failure messages against the baseline. Latency is
+        only compared when the baseline was recorded on the same database and
+        dataset, and never with `check_latency=False` (query budgets only,
+        e.g. in CI).
+        """
+        failures = []
+        compare_latency = (
+            check_latency
+            and baseline.get("database") == connection.vendor
+            and baseline.get("dataset") == describe_dataset()
+        )
+        if check_latency and not compare_latency:
+            self.log("Latency not compared: the baseline used another database/dataset")
+        for name, result in results.items():
+            failures += [f"{name}: {error}" for error in result["errors"]]
+            expected = baseline.get("routes", {}).get(name)
+            if expected is None:
+                continue
+            if result["queries"] > expected["queries"]:
+                failures.append(
+                    f"{name}: {result['queries']} queries "
+                    f"(baseline {expected['queries']})"
+                )
+            if not compare_latency or "wall_ms" not in expected:
+                continue
+            limit = expected["wall_ms"] * self.threshold + self.slack_ms
+            if result["wall_ms"] > limit:
+                failures.append(
+                    f"{name}: {result['wall_ms']:.1f} ms "
+                    f"(baseline {expected['wall_ms']:.1f} ms, limit {limit:.1f} ms)"
+                )
+        return failures
+
+
+def describe_dataset():
+    """
+    What the numbers were measured on: the generate_scale_data parameters
+    recoverable from the data (seed, sizes and order history span).
+    """
+    # ---> Generated users are named scale-<seed>-<n>@...
+    email = (
+        User.objects.filter(email__startswith="scale-")
+        .values_list("email", flat=True)
+        .first()
+    )
+    history = Order.objects.aggregate(first=Min("created_at"), last=Max("created_at"))
+    return {
+        "seed": int(email.split("-")[1]) if email else None,
+        "users": User.objects.count(),
+        "categories": Category.objects.count(),
+        "products": Product.objects.count(),
+        "reviews": Review.objects.count(),
+        "orders": Order.objects.count(),
+        "orders_from": history["first"] and history["first"].date().isoformat(),
+        "orders_until": history["last"] and history["last"].date().isoformat(),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    routes = {
+        name: {
+            key: result[key]
+            for key in ("queries", "db_ms", "wall_ms")
+            if key == "queries" or name not in UNBOUNDED_ROUTES
+        }
+        for name, result in sorted(results.items())
+    }
+    baseline = {
+        "database": connection.vendor,
+        "dataset": describe_dataset(),
+        "routes": routes,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(baseline, file, indent=2)
+        file.write("\n")
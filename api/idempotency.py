@@ -0,0 +1,166 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+def _sha256(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Stores the first response for (user, Idempotency-Key) and replays it.
+     - The first request inserts an "in flight" row leased until
+       `locked_until`, runs and stores its result
+     - Duplicates replay the stored status and body without re-running
+     - Duplicates arriving while the first is still running wait for it
+     - Failures (exceptions, 5xx) drop the row so the client can retry; a row
+       left behind by a request that died mid-flight is taken over by the
+       next retry once its lease (IDEMPOTENCY_LEASE) has expired
+    """
+
+    poll_interval = 0.05
+
+    @staticmethod
+    def key(method, path, client_key):
+        return _sha256(f"{method}:{path}:{client_key}")
+
+    @staticmethod
+    def fingerprint(data):
+        return _sha256(json.dumps(data, sort_keys=True, default=str))
+
+    @staticmethod
+    def expiry_cutoff():
+        return timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+
+    @classmethod
+    def run(cls, request, handler):
+        client_key = request.headers.get(HEADER)
+        if not client_key or not request.user.is_authenticated:
+            return handler()
+        if len(client_key) > 255:
+            return Response(
+                {"detail": f"{HEADER} must be at most 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = cls.key(request.method, request.path, client_key)
+        fingerprint = cls.fingerprint(request.data)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+        while True:
+            lease, record = cls._claim(request.user, key, fingerprint)
+            if lease is not None:
+                return cls._execute(request.user, key, lease, handler)
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"{HEADER} was already used for a different request."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record.is_complete:
+                response = Response(record.response_body, status=record.status_code)
+                response["Idempotent-Replayed"] = "true"
+                return response
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": "A request with this key is still being processed."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            time.sleep(cls.poll_interval)
+
+    @classmethod
+    def _claim(cls, user, key, fingerprint):
+        """
+        Insert the in-flight row, or take over one whose lease has expired.
+        Returns (lease, None) when the caller owns the key, otherwise
+        (None, existing row).
+        """
+        lease = timezone.now() + settings.IDEMPOTENCY_LEASE
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=fingerprint, locked_until=lease
+                )
+            return lease, None
+        except IntegrityError:
+            pass
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # ---> The owner failed and released the key between our two queries
+            return cls._claim(user, key, fingerprint)
+        if record.created_at < cls.expiry_cutoff():
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            return cls._claim(user, key, fingerprint)
+        if (
+            not record.is_complete
+            and record.fingerprint == fingerprint
+            and (record.locked_until is None or record.locked_until <= timezone.now())
+        ):
+            # ---> The owner died mid-flight; the conditional UPDATE lets only
+            # ---> one retry take its place
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk,
+                status_code__isnull=True,
+                locked_until=record.locked_until,
+            ).update(locked_until=lease)
+            if taken:
+                return lease, None
+            return cls._claim(user, key, fingerprint)
+        return None, record
+
+    @staticmethod
+    def _execute(user, key, lease, handler):
+        # ---> Only touch the row while we still hold its lease
+        records = IdempotencyKey.objects.filter(
+            user=user, key=key, locked_until=lease, status_code__isnull=True
+        )
+        try:
+            response = handler()
+        except Exception:
+            records.delete()
+            raise
+        if response.status_code >= 500:
+            records.delete()
+            return response
+        body = json.loads(JSONRenderer().render(response.data) or b"null")
+        records.update(status_code=response.status_code, response_body=body)
+        return response
+
+    @staticmethod
+    def purge(batch_size=1000):
+        """Delete expired keys in batches, returning the number removed."""
+        removed = 0
+        cutoff = IdempotencyService.expiry_cutoff()
+        while True:
+            pks = list(
+                IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not pks:
+                return removed
+            removed += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
+
+
+def idempotent(view_method):
+    """Make a view action honour the Idempotency-Key request header."""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return IdempotencyService.run(
+            request, lambda: view_method(self, request, *args, **kwargs)
+        )
+
+    return wrapper
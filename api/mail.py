@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import OutboxEmail
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    EMAIL_BACKEND that queues messages in the OutboxEmail table instead of
+    talking to the mail server. The rows are written in the caller's
+    transaction, so a rolled back request sends nothing; `deliver_outbox_emails`
+    hands them to EMAIL_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        try:
+            emails = [
+                OutboxEmail.from_message(message)
+                for message in email_messages
+                if message.recipients()
+            ]
+            OutboxEmail.objects.bulk_create(emails)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(emails)
+
+
+class OutboxService:
+    """
+    Delivers queued emails in batches.
+     - Rows are claimed by bumping `attempts` and leasing `next_attempt_at`,
+       so workers can run side by side and a crashed worker's rows come back
+       once the lease expires
+     - One connection to EMAIL_DELIVERY_BACKEND is opened per batch and
+       reused for every message; it is reopened after a failed send
+     - Failures back off exponentially; after `max_attempts` a row is
+       dead-lettered (status "dead") and can be retried from the admin
+    """
+
+    lease = timedelta(minutes=5)
+    retry_backoff = 60  # ---> seconds, doubled on every attempt
+    max_backoff = 3600
+
+    @classmethod
+    def claim(cls, batch_size):
+        now = timezone.now()
+        with transaction.atomic():
+            pks = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            OutboxEmail.objects.filter(pk__in=pks).update(
+                attempts=F("attempts") + 1, next_attempt_at=now + cls.lease
+            )
+        return list(OutboxEmail.objects.filter(pk__in=pks).order_by("pk"))
+
+    @classmethod
+    def deliver(cls, batch_size=100, max_attempts=None):
+        """Deliver one batch; returns a count per outcome."""
+        max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        outcomes = {"sent": 0, "retried": 0, "dead": 0}
+        emails = cls.claim(batch_size)
+        if not emails:
+            return outcomes
+
+        sent, failed = [], []
+        connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+        try:
+            connection.open()
+        except Exception as e:
+            # ---> Mail server unreachable: the whole batch is retried later
+            failed = [(email, e) for email in emails]
+        else:
+            try:
+                for index, email in enumerate(emails):
+                    try:
+                        connection.send_messages([email.to_message(connection)])
+                    except Exception as e:
+                        failed.append((email, e))
+                        # ---> The connection may be broken: start a fresh one
+                        connection.close()
+                        try:
+                            connection.open()
+                        except Exception as error:
+                            failed += [(rest, error) for rest in emails[index + 1 :]]
+                            break
+                    else:
+                        sent.append(email)
+            finally:
+                connection.close()
+
+        now = timezone.now()
+        for email in sent:
+            email.status = OutboxEmail.SENT
+            email.sent_at = now
+            email.last_error = ""
+        for email, error in failed:
+            email.last_error = f"{type(error).__name__}: {error}"
+            if email.attempts >= max_attempts:
+                email.status = OutboxEmail.DEAD
+                outcomes["dead"] += 1
+            else:
+                delay = min(
+                    cls.retry_backoff * 2 ** (email.attempts - 1), cls.max_backoff
+                )
+                email.next_attempt_at = now + timedelta(seconds=delay)
+                outcomes["retried"] += 1
+        OutboxEmail.objects.bulk_update(
+            emails, ["status", "sent_at", "last_error", "next_attempt_at"]
+        )
+        outcomes["sent"] = len(sent)
+        return outcomes
+
+    @staticmethod
+    def retry(queryset):
+        """Put dead-lettered emails back in the queue."""
+        return queryset.filter(status=OutboxEmail.DEAD).update(
+            status=OutboxEmail.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            last_error="",
+        )
+
+    @staticmethod
+    def purge(older_than, batch_size=1000):
+        """Delete emails sent before `older_than` in batches, returning the number removed."""
+        removed = 0
+        while True:
+            pks = list(
+                OutboxEmail.objects.filter(
+                    status=OutboxEmail.SENT, sent_at__lt=older_than
+                ).values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                return removed
+            removed += OutboxEmail.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import UploadService
+
+
+class Command(BaseCommand):
+    help = "Store the responsive variant URLs of already uploaded images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of images read per query (default: 500).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute variants of images that already have them.",
+        )
+
+    def handle(self, *args, **options):
+        done, failed = UploadService.backfill_variants(
+            batch_size=options["batch_size"], force=options["force"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Stored variants for {done} images."))
+        if failed:
+            self.stderr.write(f"Skipped {failed} images that could not be read.")
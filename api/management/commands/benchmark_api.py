@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import (
+    BASELINE_PATH,
+    APIBenchmark,
+    load_baseline,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every GET route of the API against the local database and check "
+        "query counts and latency against the checked-in baseline. Load data "
+        "first, e.g. with generate_scale_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-sizes",
+            default="1,10,50",
+            help="Page sizes used on paginated lists (default: 1,10,50).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed requests per route and size; the median is kept (default: 5).",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.5,
+            help="Fail when wall time exceeds baseline x threshold (default: 1.5).",
+        )
+        parser.add_argument(
+            "--slack-ms",
+            type=float,
+            default=5.0,
+            help="Absolute latency allowance added to the limit (default: 5).",
+        )
+        parser.add_argument(
+            "--use-cache",
+            action="store_true",
+            help="Let the catalog response cache serve repeated requests.",
+        )
+        parser.add_argument("--baseline", default=str(BASELINE_PATH))
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write the measured numbers to the baseline instead of comparing.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            page_sizes = tuple(int(size) for size in options["page_sizes"].split(","))
+        except ValueError:
+            raise CommandError("--page-sizes must be a comma separated list of ints.")
+
+        benchmark = APIBenchmark(
+            page_sizes=page_sizes,
+            repeat=options["repeat"],
+            threshold=options["threshold"],
+            slack_ms=options["slack_ms"],
+            use_cache=options["use_cache"],
+            log=self.stdout.write,
+        )
+        results = benchmark.run()
+        if not results:
+            raise CommandError("No route could be exercised; load some data first.")
+
+        if options["update_baseline"]:
+            save_baseline(results, options["baseline"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline written to {options['baseline']}.")
+            )
+            return
+
+        failures = benchmark.compare(results, load_baseline(options["baseline"]))
+        if failures:
+            for failure in failures:
+                self.stderr.write(f"  {failure}")
+            raise CommandError(f"{len(failures)} benchmark check(s) failed.")
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(results)} routes within the baseline.")
+        )
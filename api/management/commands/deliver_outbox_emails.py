@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.mail import OutboxService
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails through EMAIL_DELIVERY_BACKEND."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Emails claimed and sent over one connection per round (default: 100).",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Attempts before an email is dead-lettered "
+            "(default: settings.EMAIL_OUTBOX_MAX_ATTEMPTS).",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            default=None,
+            help="Also delete emails sent more than this many days ago.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep running, polling for emails."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Seconds to wait when there is nothing to send (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            removed = OutboxService.purge(
+                timezone.now() - timedelta(days=options["purge_days"])
+            )
+            self.stdout.write(f"Purged {removed} sent emails.")
+
+        while True:
+            outcomes = OutboxService.deliver(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+            )
+            self.stdout.write(
+                ", ".join(f"{outcome}: {count}" for outcome, count in outcomes.items())
+            )
+            if not options["loop"]:
+                return
+            if not any(outcomes.values()):
+                time.sleep(options["interval"])
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.uploads import UploadService
+
+
+class Command(BaseCommand):
+    help = "Push spooled image uploads to the media backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Uploads claimed per model and round (default: 50).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Concurrent uploads (default: 4).",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Attempts before an upload is marked failed "
+            "(default: settings.UPLOAD_MAX_ATTEMPTS).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep running, polling for uploads."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Seconds to wait when there is nothing to upload (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            outcomes = UploadService.run(
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                max_attempts=options["max_attempts"],
+            )
+            self.stdout.write(
+                ", ".join(f"{outcome}: {count}" for outcome, count in outcomes.items())
+            )
+            if not options["loop"]:
+                return
+            if not any(outcomes.values()):
+                time.sleep(options["interval"])
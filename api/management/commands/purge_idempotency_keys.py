@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.idempotency import IdempotencyService
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of keys deleted per statement (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        removed = IdempotencyService.purge(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {removed} idempotency keys."))
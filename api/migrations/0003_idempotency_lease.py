@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_outbox_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
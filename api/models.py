@@ -1,3 +1,195 @@
+import base64
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.core.files.uploadedfile import UploadedFile
+from django.core.mail import EmailMultiAlternatives
 from django.db import models
+from django.utils import timezone
+
+from api.storage import spool_upload
+
+
+class IdempotencyKey(models.Model):
+    """First response of a request sent with an Idempotency-Key header."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    # ---> sha256 of method + path + client key, and of the request payload
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # ---> End of the in-flight lease; an unfinished row past it can be taken over
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [["user", "key"]]
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in flight'})"
+
+
+class OutboxEmail(models.Model):
+    """
+    Outgoing email queued by `api.mail.OutboxEmailBackend`, written in the
+    caller's transaction and delivered by `api.mail.OutboxService`.
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead"),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    subject = models.TextField()
+    body = models.TextField(blank=True)
+    content_subtype = models.CharField(max_length=20, default="plain")
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    # ---> [[content, mimetype], ...] and [[filename, base64 content, mimetype], ...]
+    alternatives = models.JSONField(default=list, blank=True)
+    attachments = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # ---> Worker claim: status = pending AND next_attempt_at <= now()
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    @classmethod
+    def from_message(cls, message):
+        attachments = []
+        for attachment in message.attachments:
+            if isinstance(attachment, MIMEBase):
+                raise ValueError("MIMEBase attachments can't be queued in the outbox.")
+            filename, content, mimetype = attachment
+            if isinstance(content, str):
+                content = content.encode(settings.DEFAULT_CHARSET)
+            attachments.append(
+                [filename, base64.b64encode(content).decode("ascii"), mimetype]
+            )
+        return cls(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+            headers=dict(message.extra_headers),
+            alternatives=[
+                [content, mimetype]
+                for content, mimetype in getattr(message, "alternatives", [])
+            ],
+            attachments=attachments,
+        )
+
+    def to_message(self, connection=None):
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+            headers=self.headers,
+            alternatives=[tuple(alternative) for alternative in self.alternatives],
+            connection=connection,
+        )
+        message.content_subtype = self.content_subtype
+        for filename, content, mimetype in self.attachments:
+            message.attach(filename, base64.b64decode(content), mimetype)
+        return message
+
+
+class PendingUpload(models.Model):
+    """
+    Uploads the file in `upload_field` in the background.
+    Saving an instance with a freshly uploaded file spools it to local disk and
+    marks it pending; `api.uploads.UploadService` pushes it to the media backend.
+    """
+
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    UPLOAD_STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
+    upload_field = "image"
+
+    upload_status = models.CharField(
+        max_length=10, choices=UPLOAD_STATUS_CHOICES, default=READY, db_index=True
+    )
+    spooled_file = models.CharField(max_length=255, blank=True, default="")
+    upload_attempts = models.PositiveSmallIntegerField(default=0)
+    upload_retry_at = models.DateTimeField(null=True, blank=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # ---> Precomputed delivery URLs, see api.storage.IMAGE_VARIANTS
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def upload_folder(cls):
+        return cls._meta.get_field(cls.upload_field).options.get("folder", "")
 
-# Create your models here.
+    def save(self, *args, **kwargs):
+        file = getattr(self, self.upload_field)
+        if isinstance(file, UploadedFile):
+            self.spooled_file = spool_upload(file, self.upload_folder())
+            self.upload_status = self.PENDING
+            self.upload_attempts = 0
+            self.upload_retry_at = None
+            self.variants = {}
+            self.image_width, self.image_height = (
+                (file.image_width, file.image_height)
+                if hasattr(file, "image_width")
+                else get_image_dimensions(file)
+            )
+            setattr(self, self.upload_field, None)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {
+                    "spooled_file",
+                    "upload_status",
+                    "upload_attempts",
+                    "upload_retry_at",
+                    "variants",
+                    "image_width",
+                    "image_height",
+                }
+        super().save(*args, **kwargs)
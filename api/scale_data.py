@@ -0,0 +1,542 @@
+import io
+import json
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from order.models import Cart, CartItem, Order, OrderItem, Wishlist
+from order.services import SalesRollupService
+from product.caching import bump_catalog_version
+from product.models import Category, Product, ProductImage, ProductStock, Review
+from product.search import update_search_index
+from product.services import ReviewService
+from users.models import User
+
+EMAIL_DOMAIN = "scale.invalid"
+
+ADJECTIVES = (
+    "Soft Cozy Classic Striped Denim Linen Knitted "
+    "Floral Organic Vintage Sporty Summer Winter Slim"
+).split()
+NOUNS = (
+    "T-Shirt Hoodie Dress Jacket Jeans Shorts Sweater "
+    "Skirt Romper Pajamas Cardigan Leggings Coat Polo"
+).split()
+FIRST_NAMES = "Ava Noah Mia Liam Zara Omar Lena Ravi Sofia Ken Amara Ivan".split()
+LAST_NAMES = (
+    "Khan Smith Garcia Chen Novak Rahman Silva "
+    "Okafor Müller Rossi Haddad Kim Ahmed Lopez"
+).split()
+SENTENCES = [
+    "Fits true to size and washes well.",
+    "The fabric is softer than expected.",
+    "Colour faded a little after a few washes.",
+    "My kid wears it every day.",
+    "Arrived quickly and was well packed.",
+    "Runs slightly small, order one size up.",
+    "Great value for the price.",
+    "Stitching came loose after a month.",
+]
+SIZES = [size for size, _ in ProductStock.SIZE_CHOICES]
+# ---> Skewed towards 5 stars with a bump at 1, like real review sites
+RATINGS = [
+    Decimal("5.0"),
+    Decimal("4.0"),
+    Decimal("3.0"),
+    Decimal("2.0"),
+    Decimal("1.0"),
+]
+RATING_WEIGHTS = [45, 25, 12, 8, 10]
+
+
+def zipf_weights(n, exponent):
+    """Cumulative Zipf weights for ranks 1..n (for random.choices)."""
+    return list(accumulate(1 / rank**exponent for rank in range(1, n + 1)))
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, Decimal, uuid.UUID, datetime)):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class TableWriter:
+    """
+    Writes plain row dicts straight into a model's table.
+     - Columns missing from a row get the field default (auto_now / auto_now_add
+       fields get `now`), so callers only pass what they generate
+     - PostgreSQL: COPY ... FROM STDIN per batch
+     - Other backends: executemany INSERT per batch
+     - Model save(), signals and custom bulk_create hooks are bypassed;
+       denormalized columns are rebuilt once the load is done
+    """
+
+    def __init__(self, model, batch_size, now):
+        self.model = model
+        self.batch_size = batch_size
+        self.fields = model._meta.concrete_fields
+        self.defaults = []
+        for field in self.fields:
+            if getattr(field, "auto_now", False) or getattr(
+                field, "auto_now_add", False
+            ):
+                default = now
+            elif field.has_default():
+                default = field.get_default()
+            else:
+                default = None
+            self.defaults.append((field.attname, default))
+
+    def write(self, rows):
+        written = 0
+        rows = iter(rows)
+        while True:
+            batch = [
+                [row.get(attname, default) for attname, default in self.defaults]
+                for row in islice(rows, self.batch_size)
+            ]
+            if not batch:
+                return written
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    self._copy(batch)
+                else:
+                    self._insert(batch)
+            written += len(batch)
+
+    def _copy(self, batch):
+        buffer = io.StringIO()
+        for row in batch:
+            buffer.write("\t".join(map(_copy_value, row)))
+            buffer.write("\n")
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in self.fields)
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+    def _insert(self, batch):
+        columns = ", ".join(connection.ops.quote_name(f.column) for f in self.fields)
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ", ".join(["%s"] * len(self.fields))
+        params = [
+            [
+                field.get_db_prep_save(value, connection)
+                for field, value in zip(self.fields, row)
+            ]
+            for row in batch
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", params
+            )
+
+
+class ScaleDataGenerator:
+    """
+    Deterministic synthetic dataset for load and regression testing.
+     - Same seed + same sizes + same `until` date => same rows (UUIDs included)
+     - Product popularity follows a Zipf law: reviews, wishlists, carts and
+       order lines concentrate on a few hot products, like production
+     - Primary keys are allocated up front, so every table is written with
+       COPY / multi-row INSERT and no per-row round trip
+     - Memory stays flat: only per-product stock offsets and prices are kept
+    """
+
+    def __init__(
+        self,
+        seed=42,
+        users=10_000,
+        categories=20,
+        products=10_000,
+        reviews=100_000,
+        orders=50_000,
+        years=3,
+        until=None,
+        exponent=1.1,
+        batch_size=10_000,
+        log=None,
+    ):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.sizes = {
+            "users": users,
+            "categories": categories,
+            "products": products,
+            "reviews": reviews,
+            "orders": orders,
+        }
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+        until = until or timezone.localdate()
+        self.end = timezone.make_aware(datetime.combine(until, dt_time()))
+        self.start = self.end - timedelta(days=365 * years)
+        self.span = int((self.end - self.start).total_seconds())
+        self.counts = {}
+
+    # ---> Helpers
+
+    def email_prefix(self):
+        return f"scale-{self.seed}-"
+
+    def timestamp(self, after=None):
+        if after is None:
+            return self.start + timedelta(seconds=int(self.rng.random() * self.span))
+        span = (self.end - after).total_seconds()
+        return after + timedelta(seconds=int(self.rng.random() * max(span, 0)))
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def next_pk(self, model):
+        last = model._base_manager.aggregate(last=models.Max("pk"))["last"]
+        return (last or 0) + 1
+
+    def write(self, model, rows):
+        label = model._meta.label
+        started = time.perf_counter()
+        written = TableWriter(model, self.batch_size, self.end).write(rows)
+        elapsed = time.perf_counter() - started
+        self.counts[label] = self.counts.get(label, 0) + written
+        self.log(f"{label}: {written} rows ({written / max(elapsed, 1e-6):.0f} rows/s)")
+
+    def hot_products(self, k):
+        """Product indexes drawn from the Zipf popularity distribution."""
+        return self.rng.choices(self.popularity, cum_weights=self.product_weights, k=k)
+
+    def stock_of(self, index):
+        """(stock pk, price) of a random size of the product at `index`."""
+        offset = self.stock_start[index] + self.rng.randrange(self.stock_count[index])
+        return self.stock_base + offset, self.stock_price[offset]
+
+    # ---> Tables
+
+    def generate(self):
+        if User.objects.filter(email__startswith=self.email_prefix()).exists():
+            raise ValueError(
+                f"Data for seed {self.seed} already exists; use another --seed."
+            )
+        started = time.perf_counter()
+        self.generate_users()
+        self.generate_catalog()
+        self.generate_reviews()
+        self.generate_wishlists()
+        self.generate_carts()
+        self.generate_orders()
+        self.finish()
+        return self.counts, time.perf_counter() - started
+
+    def generate_users(self):
+        count = self.sizes["users"]
+        self.user_base = self.next_pk(User)
+        prefix = self.email_prefix()
+        rng = self.rng
+
+        def rows():
+            for index in range(count):
+                yield {
+                    "id": self.user_base + index,
+                    "email": f"{prefix}{index}@{EMAIL_DOMAIN}",
+                    "password": "!",
+                    "first_name": rng.choice(FIRST_NAMES),
+                    "last_name": rng.choice(LAST_NAMES),
+                    "date_joined": self.timestamp(),
+                }
+
+        self.write(User, rows())
+
+    def generate_catalog(self):
+        rng = self.rng
+        categories = self.sizes["categories"]
+        products = self.sizes["products"]
+
+        self.category_base = category_base = self.next_pk(Category)
+        self.write(
+            Category,
+            (
+                {"id": category_base + index, "name": f"Scale {self.seed} #{index}"}
+                for index in range(categories)
+            ),
+        )
+
+        self.product_base = self.next_pk(Product)
+        self.stock_base = self.next_pk(ProductStock)
+        self.stock_start = array("l")
+        self.stock_count = array("b")
+        self.stock_price = array("l")
+        category_weights = zipf_weights(categories, self.exponent)
+        category_ids = range(category_base, category_base + categories)
+
+        def product_rows():
+            for index in range(products):
+                created_at = self.timestamp()
+                yield {
+                    "id": self.product_base + index,
+                    "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index}",
+                    "description": " ".join(rng.sample(SENTENCES, 3)),
+                    "category_id": rng.choices(
+                        category_ids, cum_weights=category_weights
+                    )[0],
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+
+        self.write(Product, product_rows())
+
+        def stock_rows():
+            offset = 0
+            for index in range(products):
+                sizes = rng.randint(1, 6)
+                base_price = rng.randrange(300, 5000, 10)
+                self.stock_start.append(offset)
+                self.stock_count.append(sizes)
+                for position, size in enumerate(sorted(rng.sample(range(6), sizes))):
+                    price = base_price + position * 50
+                    self.stock_price.append(price)
+                    yield {
+                        "id": self.stock_base + offset,
+                        "product_id": self.product_base + index,
+                        "size": SIZES[size],
+                        "price": price,
+                        # ---> ~10% of sizes sold out
+                        "stock": 0 if rng.random() < 0.1 else rng.randint(1, 200),
+                    }
+                    offset += 1
+
+        self.write(ProductStock, stock_rows())
+
+        image_base = self.next_pk(ProductImage)
+
+        def image_rows():
+            pk = image_base
+            for index in range(products):
+                for position in range(rng.randint(1, 4)):
+                    yield {
+                        "id": pk,
+                        "product_id": self.product_base + index,
+                        "image": f"Kidora/products/images/scale_{index}_{position}",
+                        "image_width": 1200,
+                        "image_height": 1500,
+                    }
+                    pk += 1
+
+        self.write(ProductImage, image_rows())
+
+        # ---> Popularity ranks are shuffled so hot products aren't the lowest pks
+        self.popularity = list(range(products))
+        rng.shuffle(self.popularity)
+        self.product_weights = zipf_weights(products, self.exponent)
+
+    def generate_reviews(self):
+        rng = self.rng
+        count = self.sizes["reviews"]
+        review_base = self.next_pk(Review)
+        users = self.sizes["users"]
+        comments = [f"{a} {b}" for a in SENTENCES for b in SENTENCES if a != b]
+        rating_weights = list(accumulate(RATING_WEIGHTS))
+
+        def rows():
+            # ---> Draws are made per batch; this loop is the hot path at 20M rows
+            for start in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - start)
+                products = self.hot_products(size)
+                ratings = rng.choices(RATINGS, cum_weights=rating_weights, k=size)
+                for offset in range(size):
+                    created_at = self.timestamp()
+                    yield {
+                        "id": review_base + start + offset,
+                        "product_id": self.product_base + products[offset],
+                        "user_id": self.user_base + int(rng.random() * users),
+                        "rating": ratings[offset],
+                        "comment": comments[int(rng.random() * len(comments))],
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    }
+
+        self.write(Review, rows())
+
+    def generate_wishlists(self):
+        rng = self.rng
+        wishlists = []
+
+        def rows():
+            for index in range(self.sizes["users"]):
+                if rng.random() < 0.4:
+                    pk = self.uuid()
+                    wishlists.append(pk)
+                    yield {"id": pk, "user_id": self.user_base + index}
+
+        self.write(Wishlist, rows())
+
+        through = Wishlist.products.through
+        item_base = self.next_pk(through)
+
+        def item_rows():
+            pk = item_base
+            for wishlist_id in wishlists:
+                products = set(self.hot_products(rng.randint(1, 20)))
+                for index in products:
+                    yield {
+                        "id": pk,
+                        "wishlist_id": wishlist_id,
+                        "product_id": self.product_base + index,
+                    }
+                    pk += 1
+
+        self.write(through, item_rows())
+
+    def generate_carts(self):
+        rng = self.rng
+        carts = []
+
+        def rows():
+            for index in range(self.sizes["users"]):
+                if rng.random() < 0.2:
+                    pk = self.uuid()
+                    carts.append(pk)
+                    yield {"id": pk, "user_id": self.user_base + index}
+
+        self.write(Cart, rows())
+
+        item_base = self.next_pk(CartItem)
+
+        def item_rows():
+            pk = item_base
+            for cart_id in carts:
+                stocks = {
+                    self.stock_of(index)[0]
+                    for index in self.hot_products(rng.randint(1, 4))
+                }
+                for stock_id in stocks:
+                    yield {
+                        "id": pk,
+                        "cart_id": cart_id,
+                        "product_stock_id": stock_id,
+                        "quantity": rng.randint(1, 3),
+                    }
+                    pk += 1
+
+        self.write(CartItem, item_rows())
+
+    def generate_orders(self):
+        rng = self.rng
+        count = self.sizes["orders"]
+        user_weights = zipf_weights(self.sizes["users"], self.exponent / 2)
+        user_ids = range(self.user_base, self.user_base + self.sizes["users"])
+        statuses = [status for status, _ in Order.STATUS_CHOICES]
+        settled = self.end - timedelta(days=14)
+        item_pk = self.next_pk(OrderItem)
+        items = []
+
+        def rows():
+            nonlocal item_pk
+            for _ in range(count):
+                pk = self.uuid()
+                created_at = self.timestamp()
+                if created_at < settled:
+                    status = Order.CANCELED if rng.random() < 0.1 else Order.DELIVERED
+                else:
+                    status = rng.choice(statuses)
+                total = 0
+                for stock_id, price in {
+                    self.stock_of(index)
+                    for index in self.hot_products(rng.randint(1, 5))
+                }:
+                    quantity = rng.randint(1, 3)
+                    total += price * quantity
+                    items.append(
+                        {
+                            "id": item_pk,
+                            "order_id": pk,
+                            "product_stock_id": stock_id,
+                            "quantity": quantity,
+                            "price": price,
+                            "total_price": price * quantity,
+                        }
+                    )
+                    item_pk += 1
+                yield {
+                    "id": pk,
+                    "user_id": rng.choices(user_ids, cum_weights=user_weights)[0],
+                    "status": status,
+                    "total_price": total,
+                    "created_at": created_at,
+                    "updated_at": self.timestamp(after=created_at),
+                }
+
+        # ---> Orders and their lines are flushed together, one batch at a time
+        orders = rows()
+        while True:
+            batch = list(islice(orders, self.batch_size))
+            if not batch:
+                break
+            self.write(Order, batch)
+            self.write(OrderItem, items)
+            items.clear()
+
+    def finish(self):
+        written = [
+            model
+            for model in (
+                User,
+                Category,
+                Product,
+                ProductStock,
+                ProductImage,
+                Review,
+                Wishlist.products.through,
+                CartItem,
+                OrderItem,
+            )
+            if model._meta.label in self.counts
+        ]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), written):
+                cursor.execute(sql)
+
+        # ---> Only the generated rows, and without touching updated_at, so
+        # ---> existing (fixture) data and the generated timestamps survive
+        products = Product.objects.filter(
+            pk__range=(
+                self.product_base,
+                self.product_base + self.sizes["products"] - 1,
+            )
+        )
+        categories = Category.objects.filter(
+            pk__range=(
+                self.category_base,
+                self.category_base + self.sizes["categories"] - 1,
+            )
+        )
+        product_ids = products.values("pk")
+        self.log("Refreshing denormalized columns...")
+        products.refresh_stock_summary(touch=False, batch_size=self.batch_size)
+        ReviewService.rebuild(product_ids, batch_size=self.batch_size)
+        categories.refresh_product_counts(touch=False)
+        update_search_index(product_ids, batch_size=self.batch_size)
+        SalesRollupService.rebuild(
+            self.start.date(), self.end.date(), batch_size=self.batch_size
+        )
+        bump_catalog_version()
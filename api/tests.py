@@ -1,3 +1,461 @@
-from django.test import TestCase
+import struct
+import tempfile
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Max
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from api.benchmarks import APIBenchmark, load_baseline
+from api.idempotency import IdempotencyService
+from api.mail import OutboxEmailBackend, OutboxService
+from api.models import IdempotencyKey, OutboxEmail, PendingUpload
+from api.scale_data import ScaleDataGenerator
+from api.storage import IMAGE_VARIANTS, LocalMediaBackend, variant_widths
+from api.upload_handlers import (
+    ImageUploadHandler,
+    UploadTooLarge,
+    image_dimensions,
+    image_format,
+)
+from api.uploads import ImageVariantsField, UploadService
+from order.models import Cart, CartItem, Wishlist
+from product.models import Category, Product, ProductImage, ProductStock
+from users.models import User
+
+
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        product = Product.objects.create(
+            name="Polo", category=Category.objects.create(name="Shirts")
+        )
+        cls.stock = ProductStock.objects.create(
+            product=product, size="M", price=100, stock=10
+        )
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+        self.url = f"/api/v1/carts/{self.cart.pk}/items/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, quantity=1, key="key-1"):
+        return self.client.post(
+            self.url,
+            {"product_stock_id": self.stock.pk, "quantity": quantity},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def in_flight(self, locked_until, quantity=1, key="key-1"):
+        payload = {"product_stock_id": self.stock.pk, "quantity": quantity}
+        return IdempotencyKey.objects.create(
+            user=self.user,
+            key=IdempotencyService.key("POST", self.url, key),
+            fingerprint=IdempotencyService.fingerprint(payload),
+            locked_until=locked_until,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.add()
+        retry = self.add()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(CartItem.objects.get(cart=self.cart).quantity, 1)
+
+    def test_key_reused_for_a_different_payload(self):
+        self.add()
+        response = self.add(quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CartItem.objects.get(cart=self.cart).quantity, 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_conflict_while_the_first_request_is_in_flight(self):
+        self.in_flight(locked_until=timezone.now() + timedelta(minutes=1))
+
+        response = self.add()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_retry_takes_over_an_expired_lease(self):
+        self.in_flight(locked_until=timezone.now() - timedelta(seconds=1))
+
+        response = self.add()
+
+        self.assertEqual(response.status_code, 201)
+        record = IdempotencyKey.objects.get()
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(CartItem.objects.get(cart=self.cart).quantity, 1)
+
+    def test_failed_request_releases_the_key(self):
+        with mock.patch(
+            "order.serializers.StockHoldService.hold", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.add()
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.add().status_code, 201)
+
+
+class ScaleDataTests(TestCase):
+    def test_refresh_leaves_existing_rows_and_timestamps_alone(self):
+        existing = Product.objects.create(
+            name="Polo", category=Category.objects.create(name="Shirts")
+        )
+        Product.objects.filter(pk=existing.pk).update(
+            updated_at=timezone.make_aware(datetime(2020, 1, 1))
+        )
+        before = Product.objects.filter(pk=existing.pk).values().get()
+
+        generator = ScaleDataGenerator(
+            users=20, categories=2, products=10, reviews=30, orders=10, years=1
+        )
+        generator.generate()
+
+        self.assertEqual(Product.objects.filter(pk=existing.pk).values().get(), before)
+        generated = Product.objects.exclude(pk=existing.pk)
+        self.assertEqual(generated.count(), 10)
+        self.assertLessEqual(
+            generated.aggregate(last=Max("updated_at"))["last"], generator.end
+        )
+        self.assertEqual(
+            sum(Category.objects.values_list("product_count", flat=True)), 11
+        )
+
+
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Runs the benchmark_api routes against a small generated dataset and
+    fails when a route's query count depends on the data / page size or
+    exceeds its budget in api/benchmark_baseline.json. Latency is left to
+    the benchmark_api command.
+    """
+
+    def setUp(self):
+        cache.clear()
+        ScaleDataGenerator(
+            users=100,
+            categories=3,
+            products=30,
+            reviews=120,
+            orders=60,
+            years=1,
+            until=date(2026, 10, 1),
+        ).generate()
+        User.objects.create_superuser(email="staff@example.com", password="x")
+        # ---> Every route needs data for both subjects, e.g. a wishlist for
+        # ---> the shoppers picked by their cart
+        product = Product.objects.order_by("pk").first()
+        for user in User.objects.filter(cart__isnull=False, wishlist__isnull=True):
+            Wishlist.objects.create(user=user).products.add(product)
+
+    def test_routes_stay_within_their_query_budget(self):
+        baseline = load_baseline()
+        benchmark = APIBenchmark(page_sizes=(1, 10), repeat=1)
+
+        results = benchmark.run()
+
+        self.assertEqual(set(results), set(baseline["routes"]))
+        self.assertEqual(benchmark.compare(results, baseline, check_latency=False), [])
+
+
+class DroppingEmailBackend(BaseEmailBackend):
+    """Delivery backend whose connection breaks on a message titled "boom"."""
+
+    delivered = []
+
+    def open(self):
+        self.connected = True
+        return True
+
+    def close(self):
+        self.connected = False
+
+    def send_messages(self, email_messages):
+        if not getattr(self, "connected", False):
+            raise ConnectionError("not connected")
+        for message in email_messages:
+            if message.subject == "boom":
+                self.connected = False
+                raise ConnectionError("connection dropped")
+            self.delivered.append(message.subject)
+        return len(email_messages)
+
+
+@override_settings(EMAIL_DELIVERY_BACKEND="api.tests.DroppingEmailBackend")
+class OutboxDeliveryTests(TestCase):
+    def setUp(self):
+        DroppingEmailBackend.delivered = []
+        OutboxEmailBackend().send_messages(
+            [
+                EmailMessage(subject, "body", "shop@example.com", ["a@example.com"])
+                for subject in ("first", "boom", "last")
+            ]
+        )
+
+    def test_failed_send_reconnects_for_the_rest_of_the_batch(self):
+        outcomes = OutboxService.deliver()
+
+        self.assertEqual(outcomes, {"sent": 2, "retried": 1, "dead": 0})
+        self.assertEqual(DroppingEmailBackend.delivered, ["first", "last"])
+        failed = OutboxEmail.objects.get(subject="boom")
+        self.assertEqual(failed.status, OutboxEmail.PENDING)
+        self.assertEqual(failed.last_error, "ConnectionError: connection dropped")
+
+
+def image_bytes(format, size=(300, 200), mode="RGB", **options):
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+class UploadServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name="Polo", category=Category.objects.create(name="Shirts")
+        )
+
+    def setUp(self):
+        root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.spool_root = root / "spool"
+        spool = FileSystemStorage(location=self.spool_root)
+        self.enterContext(override_settings(MEDIA_ROOT=root / "media"))
+        self.enterContext(mock.patch("api.storage.spool_storage", spool))
+        self.enterContext(mock.patch("api.uploads.spool_storage", spool))
+        self.enterContext(mock.patch("api.uploads.media_backend", LocalMediaBackend()))
+
+    def spool_image(self, width=300, height=200):
+        data = image_bytes("PNG", size=(width, height))
+        image = ProductImage(product=self.product)
+        image.image = SimpleUploadedFile("polo.png", data, "image/png")
+        image.save()
+        return image
+
+    def spooled(self):
+        return [path for path in self.spool_root.rglob("*") if path.is_file()]
+
+    def process(self, image, attempt=1, max_attempts=3):
+        return UploadService.process(
+            ProductImage,
+            image.pk,
+            image.spooled_file,
+            attempt,
+            image.image_width,
+            max_attempts,
+        )
+
+    def failing_upload(self):
+        return mock.patch.object(
+            LocalMediaBackend, "upload", side_effect=OSError("backend down")
+        )
+
+    def test_claim_leases_due_pending_rows(self):
+        image = self.spool_image()
+        ProductImage.objects.create(product=self.product)  # ---> nothing to upload
+
+        claimed = UploadService.claim(ProductImage, batch_size=10)
+
+        self.assertEqual(claimed, [(image.pk, image.spooled_file, 1, 300)])
+        self.assertEqual(UploadService.claim(ProductImage, batch_size=10), [])
+
+    def test_upload_stores_the_variants_and_removes_the_spooled_file(self):
+        image = self.spool_image()
+        ((pk, name, attempt, width),) = UploadService.claim(ProductImage, 10)
+
+        outcome = UploadService.process(ProductImage, pk, name, attempt, width, 3)
+
+        image.refresh_from_db()
+        self.assertEqual(outcome, "uploaded")
+        self.assertEqual(image.upload_status, PendingUpload.READY)
+        self.assertEqual((image.spooled_file, image.upload_retry_at), ("", None))
+        self.assertEqual(
+            {
+                name: size["width"]
+                for name, size in image.variants.items()
+                if name != "original"
+            },
+            {"thumbnail": 150, "card": 300},
+        )
+        self.assertTrue(image.variants["original"].endswith(".png"))
+        self.assertEqual(self.spooled(), [])
+
+    def test_failures_back_off_until_the_row_is_dead(self):
+        image = self.spool_image()
+
+        def attempt():
+            ((pk, name, attempt, width),) = UploadService.claim(ProductImage, 10)
+            return UploadService.process(
+                ProductImage, pk, name, attempt, width, max_attempts=2
+            )
+
+        with self.failing_upload():
+            first = attempt()
+            image.refresh_from_db()
+            self.assertGreater(image.upload_retry_at, timezone.now())
+            self.assertEqual(len(self.spooled()), 1)
+            # ---> Not due yet, then due once the back off has passed
+            self.assertEqual(UploadService.claim(ProductImage, 10), [])
+            ProductImage.objects.filter(pk=image.pk).update(
+                upload_retry_at=timezone.now()
+            )
+            second = attempt()
+
+        image.refresh_from_db()
+        self.assertEqual((first, second), ("retried", "failed"))
+        self.assertEqual(
+            (image.upload_status, image.upload_attempts), (PendingUpload.FAILED, 2)
+        )
+        self.assertEqual(self.spooled(), [])
+
+    def test_variants_are_never_wider_than_the_original(self):
+        self.assertEqual(variant_widths(None), IMAGE_VARIANTS)
+        self.assertEqual(variant_widths(2000), IMAGE_VARIANTS)
+        self.assertEqual(variant_widths(300), {"thumbnail": 150, "card": 300})
+        self.assertEqual(variant_widths(100), {"thumbnail": 100})
+
+    def test_srcset_lists_every_width_once(self):
+        image = ProductImage(
+            upload_status=PendingUpload.READY,
+            variants={
+                "original": "/o.png",
+                "thumbnail": {"width": 150, "url": "/t.jpg", "webp": "/t.webp"},
+                "card": {"width": 300, "url": "/c.jpg", "webp": "/c.webp"},
+                "full": {"width": 300, "url": "/f.jpg", "webp": "/f.webp"},
+            },
+        )
+
+        data = ImageVariantsField().to_representation(image)
+
+        self.assertEqual(data["srcset"], "/t.jpg 150w, /c.jpg 300w")
+        self.assertEqual(data["srcset_webp"], "/t.webp 150w, /c.webp 300w")
+
+    def test_failed_upload_removes_the_spooled_file(self):
+        image = self.spool_image()
+
+        with self.failing_upload():
+            outcome = self.process(image, attempt=3, max_attempts=3)
+
+        image.refresh_from_db()
+        self.assertEqual(outcome, "failed")
+        self.assertEqual(
+            (image.upload_status, image.spooled_file), (PendingUpload.FAILED, "")
+        )
+        self.assertEqual(self.spooled(), [])
+
+    def test_deleted_target_removes_the_spooled_file(self):
+        failing, uploading = self.spool_image(), self.spool_image()
+        ProductImage.objects.filter(pk__in=[failing.pk, uploading.pk]).delete()
+
+        with self.failing_upload():
+            failed = self.process(failing)
+        uploaded = self.process(uploading)
+
+        self.assertEqual((failed, uploaded), ("superseded", "superseded"))
+        self.assertEqual(self.spooled(), [])
+
+
+class ImageHeaderTests(TestCase):
+    FIXTURES = {
+        "png": {"format": "PNG"},
+        "jpeg": {"format": "JPEG"},
+        "progressive jpeg": {"format": "JPEG", "progressive": True},
+        "gif": {"format": "GIF"},
+        "lossy webp": {"format": "WEBP"},
+        "lossless webp": {"format": "WEBP", "lossless": True},
+        "extended webp": {"format": "WEBP", "mode": "RGBA"},  # ---> VP8X + alpha
+    }
+
+    def test_reads_format_and_dimensions_of_every_format(self):
+        for label, options in self.FIXTURES.items():
+            with self.subTest(label):
+                data = image_bytes(size=(321, 123), **options)
+                format = image_format(data)
+                self.assertEqual(format, options["format"].lower())
+                self.assertEqual(image_dimensions(format, data), (321, 123))
+
+    def test_truncated_headers_need_more_data(self):
+        for label, options in self.FIXTURES.items():
+            with self.subTest(label):
+                data = image_bytes(**options)
+                format = image_format(data)
+                self.assertIsNone(image_dimensions(format, data[:9]))
+
+    def test_unknown_magic_bytes(self):
+        self.assertIsNone(image_format(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3"))
+        self.assertIsNone(image_format(b"RIFF\x00\x00\x00\x00WAVEfmt "))
+        self.assertIsNone(image_dimensions("jpeg", b"\xff\xd8\x00" + b"\x00" * 16))
+
+
+class ImageUploadHandlerTests(TestCase):
+    def receive(self, data, chunk_size=64 * 1024):
+        handler = ImageUploadHandler()
+        handler.new_file("image", "upload.img", "application/octet-stream", None)
+        for start in range(0, len(data), chunk_size):
+            handler.receive_data_chunk(data[start : start + chunk_size], start)
+        return handler.file_complete(len(data))
+
+    def assertRejected(self, data, message, **kwargs):
+        with self.assertRaises(serializers.ValidationError) as raised:
+            self.receive(data, **kwargs)
+        self.assertEqual(raised.exception.detail, {"image": [message]})
+
+    def test_accepts_an_image_streamed_in_small_chunks(self):
+        file = self.receive(image_bytes("JPEG"), chunk_size=7)
+
+        self.assertEqual(file.image_format, "jpeg")
+        self.assertEqual((file.image_width, file.image_height), (300, 200))
+
+    def test_rejects_unknown_magic_bytes(self):
+        self.assertRejected(
+            b"GIF90a" + image_bytes("GIF")[6:],
+            "Upload a valid JPEG, PNG, GIF or WebP image.",
+        )
+
+    def test_rejects_a_header_cut_short(self):
+        self.assertRejected(image_bytes("PNG")[:20], "Upload a valid image.")
+
+    @override_settings(MAX_IMAGE_PIXELS=1_000_000)
+    def test_rejects_oversized_dimensions_from_the_header(self):
+        header = image_bytes("PNG")[:16] + struct.pack(">II", 2000, 1000)
+
+        self.assertRejected(header, "Image dimensions are too large.")
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=1024)
+    def test_rejects_an_oversized_file_while_streaming(self):
+        handler = ImageUploadHandler()
+        handler.new_file("image", "upload.png", "image/png", None)
+        data = image_bytes("PNG", size=(600, 600), compress_level=0)
+
+        handler.receive_data_chunk(data[:1000], 0)
+        with self.assertRaises(UploadTooLarge):
+            handler.receive_data_chunk(data[1000:2000], 1000)
+        self.assertTrue(handler.rejected)
+
+    @override_settings(MAX_IMAGE_UPLOAD_SIZE=1024)
+    def test_refuses_an_oversized_request_before_reading_it(self):
+        handler = ImageUploadHandler()
+        body = mock.Mock()
+
+        with self.assertRaises(UploadTooLarge):
+            handler.handle_raw_input(body, {}, 1024 * 1024, b"boundary")
+        body.read.assert_not_called()
@@ -0,0 +1,163 @@
+import struct
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from rest_framework import serializers
+from rest_framework.exceptions import APIException
+
+MULTIPART_OVERHEAD = 64 * 1024  # ---> boundaries, part headers and form fields
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class UploadTooLarge(APIException):
+    status_code = 413
+    default_detail = "File size must be under 5 MB."
+    default_code = "upload_too_large"
+
+
+def image_format(header):
+    """Return the image format from the file's magic bytes, or None."""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def image_dimensions(format, header):
+    """
+    Read (width, height) from the image header without decoding pixels.
+    Returns None while more of the header is needed.
+    """
+    if format == "png" and len(header) >= 24 and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+    if format == "gif" and len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+    if format == "webp" and len(header) >= 30:
+        chunk = header[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", header[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(header[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return (
+                int.from_bytes(header[24:27], "little") + 1,
+                int.from_bytes(header[27:30], "little") + 1,
+            )
+    if format == "jpeg":
+        # ---> Walk the segments up to the start-of-frame marker
+        index = 2
+        while index + 9 <= len(header):
+            if header[index] != 0xFF:
+                return None
+            marker = header[index + 1]
+            if marker == 0xFF:
+                index += 1
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack(">HH", header[index + 5 : index + 9])
+                return width, height
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                index += 2
+                continue
+            index += 2 + struct.unpack(">H", header[index + 2 : index + 4])[0]
+    return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Checks image uploads while they stream in, instead of after buffering.
+     - A Content-Length over the limit is refused before the body is read
+     - Each file is aborted as soon as it passes `settings.MAX_IMAGE_UPLOAD_SIZE`
+     - The first bytes must be a JPEG, PNG, GIF or WebP signature
+     - Width and height are read from the header and attached to the file
+       (`image_width` / `image_height`); oversized pixel counts are refused
+    """
+
+    header_limit = 256 * 1024
+
+    def __init__(self, request=None, max_files=1):
+        super().__init__(request)
+        self.max_size = settings.MAX_IMAGE_UPLOAD_SIZE
+        self.max_request_size = self.max_size * max_files + MULTIPART_OVERHEAD
+        self.rejected = False
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        if self.rejected:
+            # ---> Re-parse after a rejection (debug/error reporting): no data
+            return QueryDict(encoding=encoding), MultiValueDict()
+        if content_length and content_length > self.max_request_size:
+            # ---> The body is left unread; `rejected` makes any later parse
+            # ---> of this request return no data instead of reading it
+            self.rejected = True
+            raise UploadTooLarge()
+        return super().handle_raw_input(
+            input_data, META, content_length, boundary, encoding
+        )
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.header = b""
+        self.format = None
+        self.dimensions = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.rejected = True
+            raise UploadTooLarge()
+        if self.dimensions is None:
+            self.sniff(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def sniff(self, raw_data):
+        self.header += raw_data[: self.header_limit - len(self.header)]
+        if self.format is None and len(self.header) >= 12:
+            self.format = image_format(self.header)
+            if self.format is None:
+                self.reject("Upload a valid JPEG, PNG, GIF or WebP image.")
+        if self.format is not None:
+            self.dimensions = image_dimensions(self.format, self.header)
+        if self.dimensions is not None:
+            width, height = self.dimensions
+            if not width or not height:
+                self.reject("Upload a valid image.")
+            if width * height > settings.MAX_IMAGE_PIXELS:
+                self.reject("Image dimensions are too large.")
+        elif len(self.header) >= self.header_limit:
+            self.reject("Upload a valid image.")
+
+    def reject(self, message):
+        self.rejected = True
+        raise serializers.ValidationError({self.field_name: [message]})
+
+    def file_complete(self, file_size):
+        if self.dimensions is None:
+            self.reject("Upload a valid image.")
+        file = super().file_complete(file_size)
+        file.image_format = self.format
+        file.image_width, file.image_height = self.dimensions
+        return file
+
+
+class ImageUploadMixin:
+    """Stream multipart uploads of the view through `ImageUploadHandler`."""
+
+    max_upload_files = 1
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [
+            ImageUploadHandler(request, max_files=self.max_upload_files)
+        ]
+        return super().initialize_request(request, *args, **kwargs)
@@ -0,0 +1,222 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.templatetags.static import static
+from django.utils import timezone
+from rest_framework import serializers
+
+from api.models import PendingUpload
+from api.storage import media_backend, spool_storage
+
+_PENDING = object()
+
+
+class UploadService:
+    """
+    Pushes spooled uploads to the media backend in the background.
+     - Rows are claimed by bumping upload_attempts and leasing upload_retry_at,
+       so workers can run side by side and a crashed worker's rows come back
+       once the lease expires
+     - Uploads run on a bounded thread pool
+     - Failures back off exponentially; after `max_attempts` a row is failed
+     - The spooled file is removed once its row is uploaded, failed, deleted
+       or given a newer file
+     - Completion saves the instance, so the usual post_save signals
+       (catalog cache, product touch) fire
+    """
+
+    lease = timedelta(minutes=10)
+    retry_backoff = 30  # ---> seconds, doubled on every attempt
+    max_backoff = 3600
+
+    @staticmethod
+    def upload_models():
+        return [
+            model for model in apps.get_models() if issubclass(model, PendingUpload)
+        ]
+
+    @classmethod
+    def claim(cls, model, batch_size):
+        now = timezone.now()
+        with transaction.atomic():
+            pks = list(
+                model.objects.select_for_update(skip_locked=True)
+                .filter(upload_status=PendingUpload.PENDING)
+                .filter(Q(upload_retry_at__isnull=True) | Q(upload_retry_at__lte=now))
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            model.objects.filter(pk__in=pks).update(
+                upload_attempts=F("upload_attempts") + 1,
+                upload_retry_at=now + cls.lease,
+            )
+        return list(
+            model.objects.filter(pk__in=pks).values_list(
+                "pk", "spooled_file", "upload_attempts", "image_width"
+            )
+        )
+
+    @classmethod
+    def process(cls, model, pk, name, attempt, width, max_attempts):
+        pending = model.objects.filter(pk=pk, spooled_file=name)
+        field = model._meta.get_field(model.upload_field)
+        try:
+            value = field.to_python(
+                media_backend.upload(spool_storage.path(name), model.upload_folder())
+            )
+            variants = media_backend.variants(value, width)
+        except Exception:
+            # ---> The spooled file goes with every terminal outcome
+            if attempt >= max_attempts:
+                pending.update(
+                    upload_status=PendingUpload.FAILED,
+                    spooled_file="",
+                    upload_retry_at=None,
+                )
+                spool_storage.delete(name)
+                return "failed"
+            delay = min(cls.retry_backoff * 2 ** (attempt - 1), cls.max_backoff)
+            if not pending.update(
+                upload_retry_at=timezone.now() + timedelta(seconds=delay)
+            ):
+                spool_storage.delete(name)
+                return "superseded"
+            return "retried"
+
+        with transaction.atomic():
+            instance = pending.select_for_update().first()
+            if instance is not None:
+                setattr(instance, model.upload_field, value)
+                instance.upload_status = PendingUpload.READY
+                instance.spooled_file = ""
+                instance.upload_retry_at = None
+                instance.variants = variants
+                instance.save(
+                    update_fields=[
+                        model.upload_field,
+                        "upload_status",
+                        "spooled_file",
+                        "upload_retry_at",
+                        "variants",
+                    ]
+                )
+        spool_storage.delete(name)
+        # ---> A row replaced or deleted meanwhile keeps its newer state
+        return "uploaded" if instance is not None else "superseded"
+
+    @classmethod
+    def run(cls, batch_size=50, workers=4, max_attempts=None):
+        """Upload one batch per model; returns a count per outcome."""
+        max_attempts = max_attempts or settings.UPLOAD_MAX_ATTEMPTS
+        jobs = [
+            (model, *row)
+            for model in cls.upload_models()
+            for row in cls.claim(model, batch_size)
+        ]
+
+        def upload(job):
+            try:
+                return cls.process(*job, max_attempts)
+            finally:
+                connections.close_all()
+
+        outcomes = {"uploaded": 0, "retried": 0, "failed": 0, "superseded": 0}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for outcome in executor.map(upload, jobs):
+                outcomes[outcome] += 1
+        return outcomes
+
+    @classmethod
+    def backfill_variants(cls, batch_size=500, force=False):
+        """
+        Compute the stored variant URLs of uploaded images that lack them.
+        Returns (stored, failed); images whose file can't be read are skipped.
+        """
+        done = failed = 0
+        for model in cls.upload_models():
+            queryset = model.objects.filter(upload_status=PendingUpload.READY).exclude(
+                **{f"{model.upload_field}__isnull": True}
+            )
+            if not force:
+                queryset = queryset.filter(variants={})
+            for instance in queryset.order_by("pk").iterator(chunk_size=batch_size):
+                value = getattr(instance, model.upload_field)
+                if not value:
+                    continue
+                try:
+                    instance.variants = media_backend.variants(
+                        value, instance.image_width
+                    )
+                except Exception:
+                    failed += 1
+                    continue
+                # ---> save() so the catalog cache / product touch signals fire
+                instance.save(update_fields=["variants"])
+                done += 1
+        return done, failed
+
+
+class UploadedImageField(serializers.ImageField):
+    """
+    Image field for `PendingUpload` models.
+    Pending uploads render as a placeholder URL; uploaded files use the stored
+    original URL, falling back to the media backend for rows without variants.
+    """
+
+    def to_internal_value(self, data):
+        # ---> Already sniffed by ImageUploadHandler; skip Pillow's verify pass
+        if hasattr(data, "image_width"):
+            return serializers.FileField.to_internal_value(self, data)
+        return super().to_internal_value(data)
+
+    def get_attribute(self, instance):
+        if getattr(instance, "upload_status", None) == PendingUpload.PENDING:
+            return _PENDING
+        variants = getattr(instance, "variants", None)
+        if variants and self.source == instance.upload_field:
+            return variants["original"]
+        return super().get_attribute(instance)
+
+    def to_representation(self, value):
+        if value is _PENDING:
+            return settings.UPLOAD_PLACEHOLDER_URL or static("api/upload-pending.svg")
+        if not value:
+            return None
+        if isinstance(value, str):
+            return value
+        return media_backend.url(value)
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Stored variant URLs plus ready-made `srcset` strings, e.g.
+    {"thumbnail": {"width", "url", "webp"}, ..., "srcset", "srcset_webp"}.
+    Nothing is built per request besides joining the stored URLs.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.update(source="*", read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        variants = getattr(instance, "variants", None)
+        if not variants or instance.upload_status != PendingUpload.READY:
+            return None
+        # ---> One candidate per width; rows stored before variant_widths may
+        #      repeat the original width for every variant wider than it
+        widths = {}
+        for name, value in variants.items():
+            if name != "original":
+                widths.setdefault(value["width"], value)
+        sizes = [widths[width] for width in sorted(widths)]
+        return {
+            **variants,
+            "srcset": ", ".join(f"{size['url']} {size['width']}w" for size in sizes),
+            "srcset_webp": ", ".join(
+                f"{size['webp']} {size['width']}w" for size in sizes
+            ),
+        }
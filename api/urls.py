@@ -9,7 +9,13 @@ from product.views import (
     ReviewViewSet,
     ReviewImageViewSet,
 )
-from order.views import CartViewSet, CartItemViewSet, OrderViewSet, WishlistViewSet
+from order.views import (
+    CartViewSet,
+    CartItemViewSet,
+    OrderViewSet,
+    SalesReportViewSet,
+    WishlistViewSet,
+)
 
 router = routers.DefaultRouter()
 router.register("categories", CategoryViewSet)
@@ -17,6 +23,7 @@ router.register("products", ProductViewSet, basename="products")
 router.register("carts", CartViewSet, basename="carts")
 router.register("orders", OrderViewSet, basename="orders")
 router.register("wishlists", WishlistViewSet, basename="wishlists")
+router.register("sales", SalesReportViewSet, basename="sales")
 
 product_router = routers.NestedDefaultRouter(router, "products", lookup="product")
 product_router.register("reviews", ReviewViewSet, basename="product-review")
@@ -110,6 +110,38 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# -----> Local memory by default, point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# -----> a shared file based cache in production (see product.caching)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="kidora"),
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=300, cast=int)
+WISHLIST_CACHE_TIMEOUT = config("WISHLIST_CACHE_TIMEOUT", default=3600, cast=int)
+
+
+# -----> How long adding an item to the cart reserves its stock (order.services.StockHoldService)
+CART_HOLD_TTL = timedelta(minutes=config("CART_HOLD_MINUTES", default=15, cast=int))
+
+
+# -----> Idempotency-Key replay window, how long duplicates wait on the first request
+# -----> and how long an unfinished request owns its key before a retry may take over
+IDEMPOTENCY_KEY_TTL = timedelta(
+    hours=config("IDEMPOTENCY_KEY_HOURS", default=24, cast=int)
+)
+IDEMPOTENCY_WAIT_TIMEOUT = config("IDEMPOTENCY_WAIT_SECONDS", default=10, cast=float)
+IDEMPOTENCY_LEASE = timedelta(
+    seconds=config("IDEMPOTENCY_LEASE_SECONDS", default=60, cast=int)
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -165,6 +197,20 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# -----> Background image uploads (api.uploads): requests spool files to
+# -----> UPLOAD_SPOOL_ROOT and `manage.py process_uploads`, running against the
+# -----> same volume, pushes them to the backend (api.storage.LocalMediaBackend offline)
+MEDIA_UPLOAD_BACKEND = config(
+    "MEDIA_UPLOAD_BACKEND", default="api.storage.CloudinaryBackend"
+)
+UPLOAD_SPOOL_ROOT = config("UPLOAD_SPOOL_ROOT", default=str(BASE_DIR / "spool"))
+UPLOAD_MAX_ATTEMPTS = config("UPLOAD_MAX_ATTEMPTS", default=5, cast=int)
+UPLOAD_PLACEHOLDER_URL = config("UPLOAD_PLACEHOLDER_URL", default="")
+
+# -----> Limits enforced while image uploads stream in (api.upload_handlers)
+MAX_IMAGE_UPLOAD_SIZE = 5 * 1024 * 1024  # ---> 5 MB
+MAX_IMAGE_PIXELS = 40_000_000
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -176,17 +222,23 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("api.authentication.CachedJWTAuthentication",),
 }
 
 
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT",),
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
 }
 
+# -----> Auth state cache (api.authentication.CachedJWTAuthentication); without a
+# -----> shared CACHE_BACKEND other processes see deactivations after this delay
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=60, cast=int)
+AUTH_VERIFIED_TOKEN_CACHE_SIZE = config(
+    "AUTH_VERIFIED_TOKEN_CACHE_SIZE", default=1024, cast=int
+)
+
 
 DJOSER = {
     "PASSWORD_RESET_CONFIRM_URL": "password/reset/confirm/{uid}/{token}",
@@ -212,7 +264,14 @@ SWAGGER_SETTINGS = {
 }
 
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# -----> Emails are queued in the api.OutboxEmail table and sent by
+# -----> `manage.py deliver_outbox_emails` through EMAIL_DELIVERY_BACKEND
+# -----> (console / locmem work offline)
+EMAIL_BACKEND = config("EMAIL_BACKEND", default="api.mail.OutboxEmailBackend")
+EMAIL_DELIVERY_BACKEND = config(
+    "EMAIL_DELIVERY_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=8, cast=int)
 EMAIL_HOST = config("EMAIL_HOST")
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool)
 EMAIL_PORT = config("EMAIL_PORT")
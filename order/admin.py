@@ -1,5 +1,15 @@
 from django.contrib import admin
-from order.models import Wishlist, Cart, CartItem, Order, OrderItem
+from order.models import (
+    Wishlist,
+    Cart,
+    CartItem,
+    Order,
+    OrderItem,
+    StockHold,
+    DailyStockSales,
+    DailyProductSales,
+    DailyCategorySales,
+)
 
 
 @admin.register(Wishlist)
@@ -15,9 +25,20 @@ class CartAdmin(admin.ModelAdmin):
 admin.site.register(CartItem)
 
 
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ["id", "cart", "product_stock", "quantity", "expires_at"]
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ["id", "user", "status", "total_price"]
 
 
 admin.site.register(OrderItem)
+
+
+@admin.register(DailyStockSales, DailyProductSales, DailyCategorySales)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ["day", "units", "revenue", "order_count", "cancellations"]
+    date_hierarchy = "day"
@@ -0,0 +1,72 @@
+import csv
+import json
+from itertools import groupby
+
+EXPORT_FIELDS = [
+    ("order_id", "id"),
+    ("created_at", "created_at"),
+    ("status", "status"),
+    ("user_email", "user__email"),
+    ("order_total", "total_price"),
+    ("item_id", "items__id"),
+    ("product_stock_id", "items__product_stock_id"),
+    ("product_name", "items__product_stock__product__name"),
+    ("size", "items__product_stock__size"),
+    ("quantity", "items__quantity"),
+    ("unit_price", "items__price"),
+    ("line_total", "items__total_price"),
+]
+ORDER_COLUMNS = 5  # ---> The leading EXPORT_FIELDS describe the order itself
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield one tuple per order item (orders without items yield one row).
+    Plain tuples from a single joined query read through `iterator()`, so
+    memory stays flat no matter how many orders are exported.
+    """
+    rows = (
+        queryset.order_by("created_at", "id", "items__id")
+        .values_list(*[lookup for _, lookup in EXPORT_FIELDS])
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield tuple(
+            value.isoformat() if hasattr(value, "isoformat") else value for value in row
+        )
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the csv writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_FIELDS])
+    for row in export_rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset, chunk_size=2000):
+    """One JSON object per order, with its items nested."""
+    order_names = [name for name, _ in EXPORT_FIELDS[:ORDER_COLUMNS]]
+    item_names = [name for name, _ in EXPORT_FIELDS[ORDER_COLUMNS:]]
+    rows = export_rows(queryset, chunk_size)
+    for _, order_rows in groupby(rows, key=lambda row: row[0]):
+        order_rows = list(order_rows)
+        order = dict(zip(order_names, order_rows[0][:ORDER_COLUMNS]))
+        order["items"] = [
+            dict(zip(item_names, row[ORDER_COLUMNS:]))
+            for row in order_rows
+            if row[ORDER_COLUMNS] is not None
+        ]
+        yield json.dumps(order, default=str) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+}
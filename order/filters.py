@@ -0,0 +1,25 @@
+from django_filters.rest_framework import (
+    ChoiceFilter,
+    DateFilter,
+    FilterSet,
+    IsoDateTimeFilter,
+    NumberFilter,
+)
+
+from order.models import Order
+
+
+class OrderExportFilter(FilterSet):
+    status = ChoiceFilter(choices=Order.STATUS_CHOICES)
+    created_after = IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = Order
+        fields = ["status", "created_after", "created_before"]
+
+
+class SalesReportFilter(FilterSet):
+    start = DateFilter(field_name="day", lookup_expr="gte")
+    end = DateFilter(field_name="day", lookup_expr="lte")
+    id = NumberFilter(field_name="key")
@@ -0,0 +1,122 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+
+from order.models import Cart, CartItem, Order
+from order.services import OrderService
+from product.models import Category, Product, ProductStock
+from users.models import User
+
+EMAIL_PREFIX = "checkout-benchmark-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run N parallel checkouts against one contended ProductStock row and "
+        "report throughput and oversell (which must be zero)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--stock", type=int, default=100)
+        parser.add_argument("--quantity", type=int, default=1)
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=5,
+            help="Retries per checkout on database lock / serialization errors.",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the generated rows."
+        )
+
+    def handle(self, *args, **options):
+        orders, stock, quantity = (
+            options["orders"],
+            options["stock"],
+            options["quantity"],
+        )
+        product_stock, carts = self.setup(orders, stock, quantity)
+
+        outcomes = {"ok": 0, "rejected": 0, "errors": 0, "retries": 0}
+        retries = options["retries"]
+
+        def checkout(cart):
+            try:
+                for attempt in range(retries + 1):
+                    try:
+                        OrderService.create_order(user_id=cart.user_id, cart_id=cart.pk)
+                        return "ok", attempt
+                    except ValueError:
+                        return "rejected", attempt
+                    except DatabaseError:
+                        # ---> Lock timeouts / serialization failures are retryable
+                        time.sleep(min(0.01 * 2**attempt, 0.5))
+                return "errors", retries
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for outcome, attempts in executor.map(checkout, carts):
+                outcomes[outcome] += 1
+                outcomes["retries"] += attempts
+        elapsed = time.perf_counter() - started
+
+        product_stock.refresh_from_db()
+        sold = outcomes["ok"] * quantity
+        oversold = max(0, sold - stock)
+        mismatch = (stock - product_stock.stock) != sold
+
+        self.stdout.write(
+            f"{orders} checkouts / {options['workers']} workers in {elapsed:.2f}s "
+            f"({orders / elapsed:.1f} checkouts/s)\n"
+            f"  succeeded: {outcomes['ok']}  rejected (no stock): "
+            f"{outcomes['rejected']}  failed after retries: {outcomes['errors']}  "
+            f"retries: {outcomes['retries']}\n"
+            f"  stock: {stock} -> {product_stock.stock}  sold: {sold}  "
+            f"oversold: {oversold}"
+        )
+
+        if not options["keep"]:
+            self.cleanup(product_stock)
+
+        if oversold or mismatch:
+            raise CommandError("Inventory inconsistency detected.")
+        self.stdout.write(self.style.SUCCESS("No oversell."))
+
+    def setup(self, orders, stock, quantity):
+        category, _ = Category.objects.get_or_create(name="Checkout benchmark")
+        product = Product.objects.create(name="Checkout benchmark", category=category)
+        product_stock = ProductStock.objects.create(
+            product=product, size="M", price=100, stock=stock
+        )
+
+        User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+        User.objects.bulk_create(
+            [
+                User(email=f"{EMAIL_PREFIX}{index}@example.invalid", password="!")
+                for index in range(orders)
+            ]
+        )
+        users = User.objects.filter(email__startswith=EMAIL_PREFIX)
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in users])
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_stock=product_stock, quantity=quantity)
+                for cart in carts
+            ]
+        )
+        return product_stock, carts
+
+    def cleanup(self, product_stock):
+        Order.objects.filter(user__email__startswith=EMAIL_PREFIX).delete()
+        User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+        product = product_stock.product
+        category = product.category
+        product.delete()
+        if not category.products.exists():
+            category.delete()
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from order.services import StockHoldService
+
+
+class Command(BaseCommand):
+    help = "Delete expired cart stock holds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds deleted per statement (default: 1000).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            removed = StockHoldService.expire(batch_size=options["batch_size"])
+            self.stdout.write(f"Expired {removed} stock holds.")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
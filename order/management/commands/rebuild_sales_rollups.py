@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from order.services import SalesRollupService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups from orders (optionally for a date range)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rollup rows inserted per statement (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start, end = (
+                date.fromisoformat(options[name]) if options[name] else None
+                for name in ("start", "end")
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        rebuilt = SalesRollupService.rebuild(
+            start=start, end=end, batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} rollup rows."))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0002_initial"),
+        ("product", "0007_category_product_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockHold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "cart",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="holds",
+                        to="order.cart",
+                    ),
+                ),
+                (
+                    "product_stock",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="holds",
+                        to="product.productstock",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock Hold",
+                "verbose_name_plural": "Stock Holds",
+                "indexes": [
+                    models.Index(
+                        fields=["product_stock", "expires_at"],
+                        name="order_stock_product_d3435b_idx",
+                    ),
+                    models.Index(
+                        fields=["expires_at"], name="order_stock_expires_f67345_idx"
+                    ),
+                ],
+                "unique_together": {("cart", "product_stock")},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0003_stock_hold"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at", "id"], name="order_order_created_47a984_idx"
+            ),
+        ),
+    ]
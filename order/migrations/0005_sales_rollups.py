@@ -0,0 +1,126 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("order", "0004_order_created_at_index"),
+        ("product", "0007_category_product_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyCategorySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("units", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.IntegerField(default=0)),
+                ("cancellations", models.IntegerField(default=0)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="product.category",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Category Sales",
+                "verbose_name_plural": "Daily Category Sales",
+                "ordering": ["-day"],
+                "abstract": False,
+                "unique_together": {("day", "category")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyProductSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("units", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.IntegerField(default=0)),
+                ("cancellations", models.IntegerField(default=0)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="product.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Product Sales",
+                "verbose_name_plural": "Daily Product Sales",
+                "ordering": ["-day"],
+                "abstract": False,
+                "unique_together": {("day", "product")},
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyStockSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("units", models.IntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.IntegerField(default=0)),
+                ("cancellations", models.IntegerField(default=0)),
+                (
+                    "product_stock",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="product.productstock",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Stock Sales",
+                "verbose_name_plural": "Daily Stock Sales",
+                "ordering": ["-day"],
+                "abstract": False,
+                "unique_together": {("day", "product_stock")},
+            },
+        ),
+    ]
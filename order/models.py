@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from uuid import uuid4
 
@@ -23,6 +24,27 @@ class Wishlist(models.Model):
         verbose_name_plural = "Wishlists"
 
 
+class CartQuerySet(models.QuerySet):
+    def with_items(self):
+        """
+        Cart read model: the cart total is computed in SQL and the items come
+        with their stock, product and line totals in a single prefetch query,
+        so reading a cart costs two queries regardless of its size.
+        """
+        totals = (
+            CartItem.objects.filter(cart=models.OuterRef("pk"))
+            .order_by()
+            .values("cart")
+            .annotate(total=models.Sum(CartItem.line_total_expression()))
+            .values("total")
+        )
+        return self.annotate(
+            total_price=Coalesce(models.Subquery(totals), 0)
+        ).prefetch_related(
+            models.Prefetch("items", queryset=CartItem.objects.with_line_totals())
+        )
+
+
 class Cart(models.Model):
     """User's shopping cart."""
 
@@ -30,6 +52,8 @@ class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="cart")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CartQuerySet.as_manager()
+
     def __str__(self):
         return f"Cart of {self.user.email}"
 
@@ -39,6 +63,13 @@ class Cart(models.Model):
         verbose_name_plural = "Carts"
 
 
+class CartItemQuerySet(models.QuerySet):
+    def with_line_totals(self):
+        return self.select_related("product_stock__product").annotate(
+            line_total=CartItem.line_total_expression()
+        )
+
+
 class CartItem(models.Model):
     """Item in a cart."""
 
@@ -46,6 +77,15 @@ class CartItem(models.Model):
     product_stock = models.ForeignKey("product.ProductStock", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
 
+    objects = CartItemQuerySet.as_manager()
+
+    @staticmethod
+    def line_total_expression():
+        return models.ExpressionWrapper(
+            models.F("quantity") * models.F("product_stock__price"),
+            output_field=models.BigIntegerField(),
+        )
+
     class Meta:
         unique_together = [["cart", "product_stock"]]
         verbose_name = "Cart Item"
@@ -55,6 +95,30 @@ class CartItem(models.Model):
         return f"{self.quantity} x {self.product_stock.product.name} ({self.product_stock.size})"
 
 
+class StockHold(models.Model):
+    """Time-limited reservation of ProductStock units for a cart."""
+
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="holds")
+    product_stock = models.ForeignKey(
+        "product.ProductStock", on_delete=models.CASCADE, related_name="holds"
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = [["cart", "product_stock"]]
+        indexes = [
+            # ---> Active holds per stock row: stock_id = ? AND expires_at > now()
+            models.Index(fields=["product_stock", "expires_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+        verbose_name = "Stock Hold"
+        verbose_name_plural = "Stock Holds"
+
+    def __str__(self):
+        return f"{self.quantity} x stock {self.product_stock_id} held until {self.expires_at}"
+
+
 class Order(models.Model):
     """User's order."""
 
@@ -72,6 +136,24 @@ class Order(models.Model):
         (CANCELED, "Canceled"),
     ]
 
+    # ---> Order life cycle: status -> statuses it may move to
+    ALLOWED_TRANSITIONS = {
+        NOT_PAID: [READY_TO_SHIP, CANCELED],
+        READY_TO_SHIP: [SHIPPED, CANCELED],
+        SHIPPED: [DELIVERED],
+        DELIVERED: [],
+        CANCELED: [],
+    }
+
+    @classmethod
+    def sources_of(cls, status):
+        """Statuses an order may be in to move to `status`."""
+        return [
+            source
+            for source, targets in cls.ALLOWED_TRANSITIONS.items()
+            if status in targets
+        ]
+
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default=NOT_PAID)
@@ -84,6 +166,8 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # ---> Date-range scans for the staff export, in export order
+        indexes = [models.Index(fields=["created_at", "id"])]
         verbose_name = "Order"
         verbose_name_plural = "Orders"
 
@@ -104,3 +188,54 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Order Item"
         verbose_name_plural = "Order Items"
+
+
+class SalesRollup(models.Model):
+    """
+    Daily sales figures, bucketed by the day the order was placed.
+    `units` and `revenue` are net of cancellations; `order_count` counts every
+    placed order and `cancellations` the ones canceled since.
+    """
+
+    day = models.DateField()
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ["-day"]
+
+
+class DailyStockSales(SalesRollup):
+    product_stock = models.ForeignKey(
+        "product.ProductStock", on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta(SalesRollup.Meta):
+        unique_together = [["day", "product_stock"]]
+        verbose_name = "Daily Stock Sales"
+        verbose_name_plural = "Daily Stock Sales"
+
+
+class DailyProductSales(SalesRollup):
+    product = models.ForeignKey(
+        "product.Product", on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta(SalesRollup.Meta):
+        unique_together = [["day", "product"]]
+        verbose_name = "Daily Product Sales"
+        verbose_name_plural = "Daily Product Sales"
+
+
+class DailyCategorySales(SalesRollup):
+    category = models.ForeignKey(
+        "product.Category", on_delete=models.CASCADE, related_name="+"
+    )
+
+    class Meta(SalesRollup.Meta):
+        unique_together = [["day", "category"]]
+        verbose_name = "Daily Category Sales"
+        verbose_name_plural = "Daily Category Sales"
@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from django.db import transaction
 
-from order.services import OrderService
+from order.filters import OrderExportFilter
+from order.services import CartService, OrderService, StockHoldService
 from order.models import Cart, CartItem, Order, OrderItem, Wishlist
 from product.models import Product, ProductStock
 
@@ -20,10 +22,8 @@ class SimpleProductSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "price"]
 
     def get_price(self, product: Product):
-        first_stock = product.stocks.first()
-        if first_stock:
-            return first_stock.price
-        return None
+        # ---> Lowest size price, denormalized on Product (None without stock rows)
+        return product.min_price or None
 
 
 class AddCartItemSerializer(serializers.ModelSerializer):
@@ -38,16 +38,26 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         product_stock_id = self.validated_data["product_stock_id"]
         quantity = self.validated_data["quantity"]
 
-        try:
-            cart_item = CartItem.objects.get(
-                cart_id=cart_id, product_stock_id=product_stock_id
-            )
-            cart_item.quantity += quantity
-            self.instance = cart_item.save()
-        except CartItem.DoesNotExist:
-            self.instance = CartItem.objects.create(
-                cart_id=cart_id, **self.validated_data
+        with transaction.atomic():
+            cart_item = (
+                CartItem.objects.select_for_update()
+                .filter(cart_id=cart_id, product_stock_id=product_stock_id)
+                .first()
             )
+            total = quantity + (cart_item.quantity if cart_item else 0)
+            try:
+                StockHoldService.hold(cart_id, product_stock_id, total)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+
+            if cart_item:
+                cart_item.quantity = total
+                cart_item.save(update_fields=["quantity"])
+                self.instance = cart_item
+            else:
+                self.instance = CartItem.objects.create(
+                    cart_id=cart_id, **self.validated_data
+                )
         return self.instance
 
     def validate_product_stock_id(self, value):
@@ -58,11 +68,55 @@ class AddCartItemSerializer(serializers.ModelSerializer):
         return value
 
 
+class BulkCartItemEntrySerializer(serializers.Serializer):
+    product_stock_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BulkAddCartItemSerializer(serializers.Serializer):
+    items = BulkCartItemEntrySerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_items(self, items):
+        # ---> Repeated stock ids are merged into one row
+        quantities = {}
+        for item in items:
+            stock_id = item["product_stock_id"]
+            quantities[stock_id] = quantities.get(stock_id, 0) + item["quantity"]
+
+        existing = set(
+            ProductStock.objects.filter(pk__in=quantities).values_list("pk", flat=True)
+        )
+        missing = sorted(set(quantities) - existing)
+        if missing:
+            raise serializers.ValidationError(
+                f"ProductStock with ids:{missing} does't exists."
+            )
+        return quantities
+
+    def save(self, **kwargs):
+        try:
+            CartService.add_items(self.context["cart_id"], self.validated_data["items"])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
 class UpdateCartItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CartItem
         fields = ["quantity"]
 
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            try:
+                StockHoldService.hold(
+                    instance.cart_id,
+                    instance.product_stock_id,
+                    validated_data.get("quantity", instance.quantity),
+                )
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+            return super().update(instance, validated_data)
+
 
 class CartItemSerializer(serializers.ModelSerializer):
     product_stock = SimpleProductSerializer(source="product_stock.product")
@@ -74,6 +128,8 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ["id", "product_stock", "quantity", "total_price"]
 
     def get_total_price(self, cart_item: CartItem):
+        if hasattr(cart_item, "line_total"):
+            return cart_item.line_total
         return cart_item.product_stock.price * cart_item.quantity
 
 
@@ -88,6 +144,8 @@ class CartSerializer(serializers.ModelSerializer):
         read_only_fields = ["user"]
 
     def get_total_price(self, cart: Cart):
+        if hasattr(cart, "total_price"):
+            return cart.total_price
         return sum(
             [item.product_stock.price * item.quantity for item in cart.items.all()]
         )
@@ -102,7 +160,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ["id", "product_stock", "quantity", "total_price"]
 
     def get_total_price(self, order_item: OrderItem):
-        return order_item.product_stock.price * order_item.quantity
+        return order_item.total_price
 
 
 class UpdateOrderSerializer(serializers.ModelSerializer):
@@ -111,6 +169,40 @@ class UpdateOrderSerializer(serializers.ModelSerializer):
         fields = ["status"]
 
 
+class BulkOrderStatusSerializer(serializers.Serializer):
+    # ---> Most orders one request may move, by ids or by filter
+    LIMIT = 1000
+
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=LIMIT,
+        required=False,
+    )
+    filter = serializers.DictField(allow_empty=False, required=False)
+
+    def validate_filter(self, value):
+        # ---> An ignored (misspelled) key would otherwise match every order
+        known = OrderExportFilter.base_filters
+        unknown = sorted(set(value) - set(known))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown filter keys: {', '.join(unknown)}."
+            )
+        value = {key: item for key, item in value.items() if item not in (None, "")}
+        if not value:
+            raise serializers.ValidationError(
+                f"Provide at least one of: {', '.join(known)}."
+            )
+        return value
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Provide either ids or filter.")
+        return attrs
+
+
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
 
@@ -123,7 +215,8 @@ class OrderCreateSerializer(serializers.Serializer):
     cart_id = serializers.UUIDField()
 
     def validate_cart_id(self, cart_id):
-        if not Cart.objects.filter(pk=cart_id).exists():
+        user_id = self.context.get("user_id")
+        if not Cart.objects.filter(pk=cart_id, user_id=user_id).exists():
             raise serializers.ValidationError(
                 "Cart does not exist or does not belong to the user."
             )
@@ -158,3 +251,15 @@ class WishlistSerializer(serializers.ModelSerializer):
         model = Wishlist
         fields = ["id", "user", "products", "created_at"]
         read_only_fields = ["user"]
+
+
+class SalesTotalSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source="key")
+    units = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    order_count = serializers.IntegerField()
+    cancellations = serializers.IntegerField()
+
+
+class SalesRollupSerializer(SalesTotalSerializer):
+    day = serializers.DateField()
@@ -1,31 +1,377 @@
-from order.models import Cart, Order, OrderItem
-from django.db import transaction
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from order.models import (
+    Cart,
+    CartItem,
+    DailyCategorySales,
+    DailyProductSales,
+    DailyStockSales,
+    Order,
+    OrderItem,
+    StockHold,
+    Wishlist,
+)
+from product.models import Product, ProductStock
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, Q, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 
+class StockHoldService:
+    """
+    Time-limited inventory holds for carts.
+     - Available stock = stock - active holds of other carts
+     - Holds on one stock row are serialized by locking that ProductStock row,
+       the same lock checkout takes, so holds and sales never double count
+     - Expired holds are ignored by every query and purged by `expire`
+    """
+
+    @staticmethod
+    def held_by_others(product_stock_ids, cart_id):
+        """Return {product_stock_id: units held by active holds of other carts}."""
+        return dict(
+            StockHold.objects.filter(
+                product_stock_id__in=product_stock_ids,
+                expires_at__gt=timezone.now(),
+            )
+            .exclude(cart_id=cart_id)
+            .order_by()
+            .values("product_stock_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("product_stock_id", "total")
+        )
+
+    @staticmethod
+    def hold(cart_id, product_stock_id, quantity):
+        """Reserve `quantity` units of a stock row for the cart (replacing its hold)."""
+        StockHoldService.hold_many(cart_id, {product_stock_id: quantity})
+
+    @staticmethod
+    def hold_many(cart_id, quantities, add_to_cart=False):
+        """
+        Reserve units of several stock rows for the cart (replacing its holds).
+        With `add_to_cart` the quantities are added to what the cart already
+        contains; the cart items are read after the stock rows are locked.
+        """
+        with transaction.atomic():
+            stocks = dict(
+                ProductStock.objects.select_for_update()
+                .filter(pk__in=quantities)
+                .order_by("pk")
+                .values_list("pk", "stock")
+            )
+            if add_to_cart:
+                in_cart = dict(
+                    CartItem.objects.filter(
+                        cart_id=cart_id, product_stock_id__in=quantities
+                    ).values_list("product_stock_id", "quantity")
+                )
+                quantities = {
+                    pk: quantity + in_cart.get(pk, 0)
+                    for pk, quantity in quantities.items()
+                }
+
+            held = StockHoldService.held_by_others(quantities, cart_id)
+            available = {
+                pk: max(stocks.get(pk, 0) - held.get(pk, 0), 0) for pk in quantities
+            }
+            shortages = [
+                pk for pk, quantity in quantities.items() if quantity > available[pk]
+            ]
+            if len(quantities) == 1 and shortages:
+                raise ValueError(f"Only {available[shortages[0]]} items left in stock.")
+            if shortages:
+                raise ValueError(
+                    "Insufficient stock for "
+                    + ", ".join(
+                        f"product_stock_id {pk} ({available[pk]} left)"
+                        for pk in shortages
+                    )
+                    + "."
+                )
+
+            expires_at = timezone.now() + settings.CART_HOLD_TTL
+            StockHold.objects.bulk_create(
+                [
+                    StockHold(
+                        cart_id=cart_id,
+                        product_stock_id=pk,
+                        quantity=quantity,
+                        expires_at=expires_at,
+                    )
+                    for pk, quantity in quantities.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "product_stock"],
+                update_fields=["quantity", "expires_at"],
+            )
+            # ---> Any cart activity keeps the rest of the cart reserved too
+            StockHold.objects.filter(cart_id=cart_id).exclude(
+                product_stock_id__in=quantities
+            ).update(expires_at=expires_at)
+            return quantities
+
+    @staticmethod
+    def release(cart_id, product_stock_id):
+        StockHold.objects.filter(
+            cart_id=cart_id, product_stock_id=product_stock_id
+        ).delete()
+
+    @staticmethod
+    def expire(batch_size=1000):
+        """Delete expired holds in batches, returning the number removed."""
+        removed = 0
+        while True:
+            pks = list(
+                StockHold.objects.filter(expires_at__lte=timezone.now()).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not pks:
+                return removed
+            removed += StockHold.objects.filter(pk__in=pks).delete()[0]
+
+
+class CartService:
+    @staticmethod
+    def add_items(cart_id, quantities):
+        """
+        Add {product_stock_id: quantity} to the cart in one statement.
+        Existing rows are incremented through the (cart, product_stock)
+        unique constraint instead of being read and saved one by one.
+        """
+        with transaction.atomic():
+            StockHoldService.hold_many(cart_id, quantities, add_to_cart=True)
+
+            table = connection.ops.quote_name(CartItem._meta.db_table)
+            cart_value = CartItem._meta.get_field("cart").get_db_prep_value(
+                cart_id, connection
+            )
+            rows = ", ".join(["(%s, %s, %s)"] * len(quantities))
+            params = [
+                value
+                for pk, quantity in quantities.items()
+                for value in (cart_value, pk, quantity)
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (cart_id, product_stock_id, quantity) "
+                    f"VALUES {rows} "
+                    "ON CONFLICT (cart_id, product_stock_id) DO UPDATE "
+                    f"SET quantity = {table}.quantity + excluded.quantity",
+                    params,
+                )
+
+
+class SalesRollupService:
+    """
+    Daily sales rollups per product stock, product and category.
+     - Buckets are the day the order was placed, so a later cancellation
+       adjusts the day the sale was counted on
+     - Changes are applied as increments (INSERT ... ON CONFLICT DO UPDATE)
+       inside the caller's transaction, rows sorted by key so concurrent
+       checkouts lock them in the same order
+     - `rebuild` recomputes a date range from the orders in bulk
+    """
+
+    DIMENSIONS = [
+        (DailyStockSales, "product_stock_id", "product_stock_id"),
+        (DailyProductSales, "product_id", "product_stock__product_id"),
+        (DailyCategorySales, "category_id", "product_stock__product__category_id"),
+    ]
+
+    @staticmethod
+    def record_placed(order_ids):
+        SalesRollupService._record(order_ids, placed=1, canceled=0)
+
+    @staticmethod
+    def record_status_change(order_ids, old_status, new_status):
+        was_canceled = old_status == Order.CANCELED
+        if not order_ids or was_canceled == (new_status == Order.CANCELED):
+            return
+        SalesRollupService._record(
+            order_ids, placed=0, canceled=-1 if was_canceled else 1
+        )
+
+    @staticmethod
+    def _record(order_ids, placed, canceled):
+        sign = placed - canceled
+        items = OrderItem.objects.filter(order_id__in=order_ids).annotate(
+            day=TruncDate("order__created_at")
+        )
+        for model, column, lookup in SalesRollupService.DIMENSIONS:
+            rows = [
+                (row["day"], row["key"], sign * row["units"], sign * row["revenue"])
+                + (placed * row["orders"], canceled * row["orders"])
+                for row in items.values("day", key=F(lookup))
+                .annotate(
+                    units=Sum("quantity"),
+                    revenue=Sum("total_price"),
+                    orders=Count("order_id", distinct=True),
+                )
+                .order_by("day", "key")
+            ]
+            if rows:
+                SalesRollupService._increment(model, column, rows)
+
+    @staticmethod
+    def _increment(model, column, rows):
+        table = connection.ops.quote_name(model._meta.db_table)
+        counters = ["units", "revenue", "order_count", "cancellations"]
+        day_field = model._meta.get_field("day")
+        params = [
+            value
+            for day, *values in rows
+            for value in [day_field.get_db_prep_value(day, connection), *values]
+        ]
+        updates = ", ".join(
+            f"{name} = {table}.{name} + excluded.{name}" for name in counters
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (day, {column}, {', '.join(counters)}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))} "
+                f"ON CONFLICT (day, {column}) DO UPDATE SET {updates}",
+                params,
+            )
+
+    @staticmethod
+    def rebuild(start=None, end=None, batch_size=1000):
+        """Recompute the rollups of orders placed between `start` and `end` (dates)."""
+        # ---> Day bounds as datetimes so the (created_at, id) index is usable
+        tz = timezone.get_current_timezone()
+        orders = Order.objects.all()
+        if start:
+            orders = orders.filter(
+                created_at__gte=datetime.combine(start, time.min, tzinfo=tz)
+            )
+        if end:
+            orders = orders.filter(
+                created_at__lt=datetime.combine(
+                    end + timedelta(days=1), time.min, tzinfo=tz
+                )
+            )
+        canceled = Q(order__status=Order.CANCELED)
+
+        rebuilt = 0
+        with transaction.atomic():
+            items = OrderItem.objects.filter(order__in=orders).annotate(
+                day=TruncDate("order__created_at")
+            )
+            for model, column, lookup in SalesRollupService.DIMENSIONS:
+                stale = model.objects.all()
+                if start:
+                    stale = stale.filter(day__gte=start)
+                if end:
+                    stale = stale.filter(day__lte=end)
+                stale.delete()
+
+                rows = (
+                    items.values("day", key=F(lookup))
+                    .annotate(
+                        units=Sum("quantity", filter=~canceled, default=0),
+                        revenue=Sum("total_price", filter=~canceled, default=0),
+                        order_count=Count("order_id", distinct=True),
+                        cancellations=Count("order_id", filter=canceled, distinct=True),
+                    )
+                    .order_by("day", "key")
+                    .iterator(chunk_size=batch_size)
+                )
+                batch = []
+                for row in rows:
+                    row[column] = row.pop("key")
+                    batch.append(model(**row))
+                    if len(batch) >= batch_size:
+                        model.objects.bulk_create(batch)
+                        rebuilt += len(batch)
+                        batch = []
+                model.objects.bulk_create(batch)
+                rebuilt += len(batch)
+        return rebuilt
+
+
 class OrderService:
     @staticmethod
     def create_order(user_id, cart_id):
         with transaction.atomic():
-            cart = Cart.objects.get(pk=cart_id)
-            cart_item = cart.items.select_related("product").all()
+            # ---> Lock the cart first: a concurrent checkout of the same cart
+            # ---> waits here and then finds it gone instead of ordering twice
+            try:
+                cart = (
+                    Cart.objects.select_for_update()
+                    .only("id")
+                    .get(pk=cart_id, user_id=user_id)
+                )
+            except Cart.DoesNotExist:
+                raise ValueError("Cart does not exist or was already checked out.")
+            quantities = dict(cart.items.values_list("product_stock_id", "quantity"))
+            if not quantities:
+                raise ValueError("Cart is empty.")
+
+            # ---> Lock the stock rows in primary key order so concurrent
+            # ---> checkouts over overlapping carts can't deadlock
+            stocks = {
+                stock.pk: stock
+                for stock in ProductStock.objects.select_for_update(of=("self",))
+                .filter(pk__in=quantities)
+                .order_by("pk")
+                .select_related("product")
+                .only("id", "price", "stock", "size", "product__name")
+            }
+
+            if len(stocks) != len(quantities):
+                raise ValueError("Some items in the cart are no longer available.")
+            # ---> Units held by other carts are not for sale; this cart's own
+            # ---> holds are converted into the sale (deleted with the cart)
+            held = StockHoldService.held_by_others(quantities, cart_id)
+            shortages = [
+                f"{stocks[pk].product.name} ({stocks[pk].size})"
+                for pk, quantity in quantities.items()
+                if stocks[pk].stock - held.get(pk, 0) < quantity
+            ]
+            if shortages:
+                raise ValueError(f"Insufficient stock for {', '.join(shortages)}.")
+
+            # ---> One conditional UPDATE; a row only matches if it still has enough
+            # ---> stock, so a short row count means we'd oversell and roll back
+            decrement = Case(
+                *[
+                    When(pk=pk, then=F("stock") - quantity)
+                    for pk, quantity in quantities.items()
+                ],
+                output_field=PositiveIntegerField(),
+            )
+            enough_stock = reduce(
+                or_,
+                [Q(pk=pk, stock__gte=quantity) for pk, quantity in quantities.items()],
+            )
+            updated = ProductStock.objects.filter(enough_stock).update(stock=decrement)
+            if updated != len(quantities):
+                raise ValueError("Stock changed during checkout, please try again.")
 
             total_price = sum(
-                [item.product.price * item.quantity for item in cart_item]
+                stocks[pk].price * quantity for pk, quantity in quantities.items()
             )
             order = Order.objects.create(user_id=user_id, total_price=total_price)
 
             order_items = [
                 OrderItem(
                     order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    price=item.product.price,
-                    total_price=item.product.price * item.quantity,
+                    product_stock_id=pk,
+                    quantity=quantity,
+                    price=stocks[pk].price,
+                    total_price=stocks[pk].price * quantity,
                 )
-                for item in cart_item
+                for pk, quantity in quantities.items()
             ]
             OrderItem.objects.bulk_create(order_items)
+            SalesRollupService.record_placed([order.pk])
 
             cart.delete()
             return order
@@ -33,9 +379,7 @@ class OrderService:
     @staticmethod
     def cancel_Order(order, user):
         if user.is_staff:
-            order.status = Order.CANCELED
-            order.save()
-            return order
+            return OrderService.update_status(order, Order.CANCELED)
 
         if order.user != user:
             raise PermissionDenied({"detail": "You can only cancel your own order"})
@@ -43,6 +387,173 @@ class OrderService:
         if order.status == Order.DELIVERED:
             raise ValidationError({"detail": "You can not cancel an order"})
 
-        order.status = Order.CANCELED
-        order.save()
+        return OrderService.update_status(order, Order.CANCELED)
+
+    @staticmethod
+    def update_status(order, status):
+        with transaction.atomic():
+            previous = (
+                Order.objects.select_for_update()
+                .values_list("status", flat=True)
+                .get(pk=order.pk)
+            )
+            if (previous == Order.CANCELED) != (status == Order.CANCELED):
+                OrderService._move_stock(
+                    [order.pk], 1 if status == Order.CANCELED else -1
+                )
+            order.status = status
+            order.save()
+            SalesRollupService.record_status_change([order.pk], previous, status)
         return order
+
+    @staticmethod
+    def _move_stock(order_ids, sign):
+        """
+        Put the items of `order_ids` back in stock (sign=1, the orders were
+        canceled) or take them out again (sign=-1, canceled orders reopened).
+        """
+        quantities = dict(
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .values_list("product_stock_id")
+            .annotate(units=Sum("quantity"))
+            .order_by()
+        )
+        if not quantities:
+            return
+        # ---> Same lock order as checkout, so cancels and checkouts can't deadlock
+        list(
+            ProductStock.objects.select_for_update()
+            .filter(pk__in=quantities)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        change = Case(
+            *[
+                When(pk=pk, then=F("stock") + sign * units)
+                for pk, units in quantities.items()
+            ],
+            output_field=PositiveIntegerField(),
+        )
+        stocks = ProductStock.objects.filter(pk__in=quantities)
+        if sign < 0:
+            stocks = stocks.filter(
+                reduce(
+                    or_,
+                    [Q(pk=pk, stock__gte=units) for pk, units in quantities.items()],
+                )
+            )
+        # ---> ProductStockQuerySet.update refreshes the products' stock summary
+        if stocks.update(stock=change) != len(quantities):
+            raise ValidationError({"detail": "Not enough stock to reopen the order."})
+
+    @staticmethod
+    def bulk_update_status(orders, status, batch_size=200):
+        """
+        Move every order in `orders` (a queryset) allowed to reach `status`.
+        Orders are locked and moved in pk order, `batch_size` rows per
+        transaction, so no more than one batch of rows is locked at a time.
+        Returns {order_id: previous status} of every order in `orders`.
+        """
+        sources = Order.sources_of(status)
+        previous = {}
+        last = None
+        while True:
+            batch = orders.order_by("pk")
+            if last is not None:
+                batch = batch.filter(pk__gt=last)
+            with transaction.atomic():
+                rows = list(
+                    batch.select_for_update().values_list("pk", "status")[:batch_size]
+                )
+                moved = [pk for pk, current in rows if current in sources]
+                Order.objects.filter(pk__in=moved, status__in=sources).update(
+                    status=status, updated_at=timezone.now()
+                )
+                if status == Order.CANCELED:
+                    OrderService._move_stock(moved, 1)
+                for source in sources:
+                    SalesRollupService.record_status_change(
+                        [pk for pk, current in rows if current == source],
+                        source,
+                        status,
+                    )
+            previous.update(rows)
+            if len(rows) < batch_size:
+                return previous
+            last = rows[-1][0]
+
+
+class WishlistService:
+    """
+    Wishlist membership backed by the wishlist <-> product through table.
+     - Each user's product id set is cached and dropped on every change, so
+       heart icons on product cards cost one cache lookup
+     - add / remove are single idempotent statements on the through table
+    """
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"wishlist:{user_id}:ids"
+
+    @staticmethod
+    def invalidate(user_id):
+        transaction.on_commit(lambda: cache.delete(WishlistService.cache_key(user_id)))
+
+    @staticmethod
+    def get_product_ids(user):
+        """Return the set of product ids in the user's wishlist."""
+        if not user or not user.is_authenticated:
+            return frozenset()
+        key = WishlistService.cache_key(user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                Wishlist.products.through.objects.filter(
+                    wishlist__user=user
+                ).values_list("product_id", flat=True)
+            )
+            cache.set(key, ids, settings.WISHLIST_CACHE_TIMEOUT)
+        return ids
+
+    @staticmethod
+    def add(user, product_id):
+        """
+        Add a product; returns True if it was added, False if already there.
+        Raises Product.DoesNotExist for unknown products.
+        """
+        through = Wishlist.products.through
+        table, wishlists, products = (
+            connection.ops.quote_name(model._meta.db_table)
+            for model in (through, Wishlist, Product)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (wishlist_id, product_id) "
+                f"SELECT w.id, p.id FROM {wishlists} w, {products} p "
+                "WHERE w.user_id = %s AND p.id = %s "
+                "ON CONFLICT (wishlist_id, product_id) DO NOTHING",
+                [user.pk, product_id],
+            )
+            added = cursor.rowcount > 0
+        if not added:
+            # ---> Nothing inserted: already wishlisted, unknown product or no wishlist yet
+            if product_id in WishlistService.get_product_ids(user):
+                return False
+            if not Product.objects.filter(pk=product_id).exists():
+                raise Product.DoesNotExist
+            wishlist, _ = Wishlist.objects.get_or_create(user=user)
+            _, added = through.objects.get_or_create(
+                wishlist=wishlist, product_id=product_id
+            )
+        WishlistService.invalidate(user.pk)
+        return added
+
+    @staticmethod
+    def remove(user, product_id):
+        """Remove a product; returns True if it was in the wishlist."""
+        removed, _ = Wishlist.products.through.objects.filter(
+            wishlist__user=user, product_id=product_id
+        ).delete()
+        if removed:
+            WishlistService.invalidate(user.pk)
+        return bool(removed)
@@ -0,0 +1,23 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from order.models import Wishlist
+from order.services import WishlistService
+
+
+@receiver(m2m_changed, sender=Wishlist.products.through)
+def invalidate_wishlist_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            WishlistService.invalidate(instance.user_id)
+        return
+
+    # ---> product.wishlisted_by changes touch every affected user's wishlist
+    if action == "pre_clear":
+        wishlists = instance.wishlisted_by.all()
+    elif action in ("post_add", "post_remove") and pk_set:
+        wishlists = Wishlist.objects.filter(pk__in=pk_set)
+    else:
+        return
+    for user_id in wishlists.values_list("user_id", flat=True):
+        WishlistService.invalidate(user_id)
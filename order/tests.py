@@ -1,3 +1,833 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from uuid import uuid4
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from order.exports import EXPORT_FIELDS
+from order.models import (
+    Cart,
+    CartItem,
+    DailyStockSales,
+    Order,
+    OrderItem,
+    StockHold,
+    Wishlist,
+)
+from order.serializers import BulkOrderStatusSerializer
+from order.services import (
+    CartService,
+    OrderService,
+    SalesRollupService,
+    StockHoldService,
+    WishlistService,
+)
+from product.models import Category, Product, ProductStock
+from users.models import User
+
+
+def create_stocks(count, stock=10, price=100):
+    """`count` ProductStock rows, one product (and size "M") each."""
+    category = Category.objects.create(name="Shirts")
+    products = Product.objects.bulk_create(
+        Product(name=f"Product {i}", category=category) for i in range(count)
+    )
+    return ProductStock.objects.bulk_create(
+        ProductStock(product=product, size="M", price=price, stock=stock)
+        for product in products
+    )
+
+
+def fill_cart(cart, stocks, quantity=1):
+    CartItem.objects.bulk_create(
+        CartItem(cart=cart, product_stock=stock, quantity=quantity) for stock in stocks
+    )
+
+
+def place_order(user, quantities, created_at):
+    """Check out {stock: quantity} and backdate the order to `created_at`."""
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.bulk_create(
+        CartItem(cart=cart, product_stock=stock, quantity=quantity)
+        for stock, quantity in quantities.items()
+    )
+    order = OrderService.create_order(user.pk, cart.pk)
+    Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    order.created_at = created_at
+    return order
+
+
+class CartReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.stocks = create_stocks(100)
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def read_cart(self, items):
+        fill_cart(self.cart, self.stocks[:items], quantity=2)
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/v1/carts/{self.cart.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), items)
+        self.assertEqual(response.data["Total_Price"], items * 2 * 100)
+
+    def test_read_one_item(self):
+        self.read_cart(1)
+
+    def test_read_hundred_items(self):
+        self.read_cart(100)
+
+
+class UpsertTests(TestCase):
+    """The raw INSERT ... ON CONFLICT statements, on whichever database runs the suite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.stocks = create_stocks(2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cart_items_are_inserted_then_incremented(self):
+        cart = Cart.objects.create(user=self.user)
+        first, second = self.stocks
+
+        CartService.add_items(cart.pk, {first.pk: 2})
+        CartService.add_items(cart.pk, {first.pk: 3, second.pk: 1})
+
+        self.assertEqual(
+            dict(cart.items.values_list("product_stock_id", "quantity")),
+            {first.pk: 5, second.pk: 1},
+        )
+        self.assertEqual(
+            dict(StockHold.objects.values_list("product_stock_id", "quantity")),
+            {first.pk: 5, second.pk: 1},
+        )
+
+    def test_rollup_rows_are_inserted_then_incremented(self):
+        stock = self.stocks[0]
+        day = date(2026, 3, 1)
+
+        SalesRollupService._increment(
+            DailyStockSales,
+            "product_stock_id",
+            [(day, stock.pk, 2, Decimal("200.00"), 1, 0)],
+        )
+        SalesRollupService._increment(
+            DailyStockSales,
+            "product_stock_id",
+            [
+                (day, stock.pk, -2, Decimal("-200.00"), 0, 1),
+                (day + timedelta(days=1), stock.pk, 1, Decimal("100.00"), 1, 0),
+            ],
+        )
+
+        self.assertEqual(
+            list(
+                DailyStockSales.objects.order_by("day").values_list(
+                    "day",
+                    "product_stock_id",
+                    "units",
+                    "revenue",
+                    "order_count",
+                    "cancellations",
+                )
+            ),
+            [
+                (day, stock.pk, 0, Decimal("0.00"), 1, 1),
+                (day + timedelta(days=1), stock.pk, 1, Decimal("100.00"), 1, 0),
+            ],
+        )
+
+    def test_wishlist_add_reports_whether_it_inserted(self):
+        Wishlist.objects.create(user=self.user)
+        product_id = self.stocks[0].product_id
+
+        added = WishlistService.add(self.user, product_id)
+        again = WishlistService.add(self.user, product_id)
+
+        self.assertEqual((added, again), (True, False))
+        self.assertEqual(
+            list(
+                Wishlist.products.through.objects.values_list(
+                    "wishlist__user_id", "product_id"
+                )
+            ),
+            [(self.user.pk, product_id)],
+        )
+
+
+class BulkCartItemTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.first, cls.second = create_stocks(2, stock=5)
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+        self.url = f"/api/v1/carts/{self.cart.pk}/items/bulk/"
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, *items):
+        return self.client.post(
+            self.url,
+            {
+                "items": [
+                    {"product_stock_id": pk, "quantity": quantity}
+                    for pk, quantity in items
+                ]
+            },
+            format="json",
+        )
+
+    def quantities(self):
+        return dict(self.cart.items.values_list("product_stock_id", "quantity"))
+
+    def test_adds_and_merges_items(self):
+        fill_cart(self.cart, [self.first])
+
+        response = self.post(
+            (self.first.pk, 1), (self.second.pk, 2), (self.first.pk, 1)
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 2)
+        self.assertEqual(response.data["Total_Price"], 5 * 100)
+        self.assertEqual(self.quantities(), {self.first.pk: 3, self.second.pk: 2})
+
+    def test_unknown_stock_or_shortage_adds_nothing(self):
+        unknown = self.post((self.first.pk, 1), (0, 1))
+        short = self.post((self.first.pk, 1), (self.second.pk, 6))
+
+        self.assertEqual(unknown.status_code, 400)
+        self.assertEqual(short.status_code, 400)
+        self.assertEqual(self.quantities(), {})
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_other_users_cart_is_not_found(self):
+        self.client.force_authenticate(
+            User.objects.create_user(email="other@example.com")
+        )
+
+        self.assertEqual(self.post((self.first.pk, 1)).status_code, 404)
+        self.assertEqual(self.quantities(), {})
+
+
+class WishlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        category = Category.objects.create(name="Shirts")
+        cls.products = Product.objects.bulk_create(
+            Product(name=f"Product {i}", category=category) for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def toggle(self, product, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/v1/products/{product.pk}/{action}/")
+
+    def ids(self):
+        response = self.client.get("/api/v1/wishlists/", {"ids_only": "1"})
+        return response.data["ids"]
+
+    def test_add_and_remove_keep_the_cached_ids_current(self):
+        first, second, _ = self.products
+        self.assertEqual(self.ids(), [])
+
+        added = self.toggle(second, "add_to_wishlist")
+        again = self.toggle(second, "add_to_wishlist")
+        self.toggle(first, "add_to_wishlist")
+        self.assertEqual(self.ids(), [first.pk, second.pk])
+
+        removed = self.toggle(second, "remove_from_wishlist")
+        missing = self.toggle(second, "remove_from_wishlist")
+
+        self.assertEqual((added.status_code, again.status_code), (201, 200))
+        self.assertEqual((added.data["success"], again.data["success"]), (True, False))
+        self.assertEqual(
+            (removed.data["success"], missing.data["success"]), (True, False)
+        )
+        self.assertEqual(self.ids(), [first.pk])
+
+    def test_membership_is_served_from_the_cache(self):
+        self.toggle(self.products[0], "add_to_wishlist")
+        self.ids()
+
+        with self.assertNumQueries(0):
+            ids = WishlistService.get_product_ids(self.user)
+        self.assertEqual(ids, {self.products[0].pk})
+
+    def test_unknown_product_is_not_found(self):
+        self.assertEqual(
+            self.client.post("/api/v1/products/0/add_to_wishlist/").status_code, 404
+        )
+        self.assertEqual(
+            self.client.post("/api/v1/products/0/remove_from_wishlist/").status_code,
+            404,
+        )
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.stocks = create_stocks(100)
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=self.user)
+
+    def checkout(self, items):
+        fill_cart(self.cart, self.stocks[:items], quantity=2)
+        with self.assertNumQueries(24):
+            order = OrderService.create_order(self.user.pk, self.cart.pk)
+        self.assertEqual(order.total_price, items * 2 * 100)
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), items)
+        self.assertFalse(Cart.objects.filter(pk=self.cart.pk).exists())
+        self.assertEqual(
+            set(
+                ProductStock.objects.filter(pk__in=[s.pk for s in self.stocks[:items]])
+                .values_list("stock", flat=True)
+                .distinct()
+            ),
+            {8},
+        )
+
+    def test_checkout_one_item(self):
+        self.checkout(1)
+
+    def test_checkout_hundred_items(self):
+        self.checkout(100)
+
+    def test_shortage_rolls_back(self):
+        stock = self.stocks[0]
+        fill_cart(self.cart, [stock], quantity=11)
+        with self.assertRaisesMessage(ValueError, "Insufficient stock for Product 0"):
+            OrderService.create_order(self.user.pk, self.cart.pk)
+        stock.refresh_from_db()
+        self.assertEqual(stock.stock, 10)
+        self.assertFalse(Order.objects.exists())
+        self.assertTrue(Cart.objects.filter(pk=self.cart.pk).exists())
+
+    def test_cancel_restores_stock(self):
+        stock = self.stocks[0]
+        fill_cart(self.cart, [stock], quantity=2)
+        order = OrderService.create_order(self.user.pk, self.cart.pk)
+
+        OrderService.cancel_Order(order, self.user)
+
+        stock.refresh_from_db()
+        self.assertEqual(stock.stock, 10)
+        self.assertEqual(Product.objects.get(pk=stock.product_id).total_stock, 10)
+
+    def test_bulk_cancel_restores_stock_once(self):
+        stock = self.stocks[0]
+        fill_cart(self.cart, [stock], quantity=2)
+        order = OrderService.create_order(self.user.pk, self.cart.pk)
+        orders = Order.objects.filter(pk=order.pk)
+
+        OrderService.bulk_update_status(orders, Order.CANCELED)
+        OrderService.bulk_update_status(orders, Order.CANCELED)
+
+        stock.refresh_from_db()
+        self.assertEqual(stock.stock, 10)
+
+    def test_reopening_a_canceled_order_takes_the_stock_again(self):
+        stock = self.stocks[0]
+        fill_cart(self.cart, [stock], quantity=2)
+        order = OrderService.create_order(self.user.pk, self.cart.pk)
+        OrderService.update_status(order, Order.CANCELED)
+        ProductStock.objects.filter(pk=stock.pk).update(stock=1)
+
+        with self.assertRaisesMessage(ValidationError, "Not enough stock"):
+            OrderService.update_status(order, Order.NOT_PAID)
+        ProductStock.objects.filter(pk=stock.pk).update(stock=2)
+        OrderService.update_status(order, Order.NOT_PAID)
+
+        stock.refresh_from_db()
+        self.assertEqual(stock.stock, 0)
+
+    def test_cart_checked_out_once(self):
+        fill_cart(self.cart, self.stocks[:1])
+        OrderService.create_order(self.user.pk, self.cart.pk)
+        with self.assertRaisesMessage(ValueError, "already checked out"):
+            OrderService.create_order(self.user.pk, self.cart.pk)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class StockHoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.stock, cls.other_stock = create_stocks(2, stock=5)
+        cls.users = [
+            User.objects.create_user(email=f"shopper{i}@example.com") for i in range(2)
+        ]
+
+    def setUp(self):
+        self.cart, self.other_cart = [
+            Cart.objects.create(user=user) for user in self.users
+        ]
+
+    def test_hold_reserves_units_from_other_carts(self):
+        StockHoldService.hold(self.other_cart.pk, self.stock.pk, 3)
+
+        StockHoldService.hold(self.cart.pk, self.stock.pk, 2)
+        with self.assertRaisesMessage(ValueError, "Only 2 items left in stock."):
+            StockHoldService.hold(self.cart.pk, self.stock.pk, 3)
+        self.assertEqual(
+            StockHold.objects.get(cart=self.cart, product_stock=self.stock).quantity, 2
+        )
+
+    def test_hold_many_lists_every_shortage(self):
+        StockHoldService.hold(self.other_cart.pk, self.stock.pk, 4)
+
+        with self.assertRaisesMessage(
+            ValueError,
+            f"Insufficient stock for product_stock_id {self.stock.pk} (1 left), "
+            f"product_stock_id {self.other_stock.pk} (5 left).",
+        ):
+            StockHoldService.hold_many(
+                self.cart.pk, {self.stock.pk: 2, self.other_stock.pk: 6}
+            )
+        self.assertFalse(StockHold.objects.filter(cart=self.cart).exists())
+
+    def test_expired_holds_are_ignored_and_purged(self):
+        StockHoldService.hold(self.other_cart.pk, self.stock.pk, 5)
+        StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        StockHoldService.hold(self.cart.pk, self.stock.pk, 5)
+        self.assertEqual(StockHoldService.expire(), 1)
+        self.assertEqual(
+            list(StockHold.objects.values_list("cart_id", flat=True)), [self.cart.pk]
+        )
+
+    def test_checkout_cannot_sell_units_held_by_another_cart(self):
+        StockHoldService.hold(self.other_cart.pk, self.stock.pk, 4)
+        fill_cart(self.cart, [self.stock], quantity=2)
+
+        with self.assertRaisesMessage(ValueError, "Insufficient stock for Product 0"):
+            OrderService.create_order(self.users[0].pk, self.cart.pk)
+
+    def test_adding_past_the_available_stock_is_rejected(self):
+        StockHoldService.hold(self.other_cart.pk, self.stock.pk, 4)
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        url = f"/api/v1/carts/{self.cart.pk}/items/"
+
+        created = client.post(url, {"product_stock_id": self.stock.pk, "quantity": 1})
+        rejected = client.post(url, {"product_stock_id": self.stock.pk, "quantity": 1})
+
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(rejected.status_code, 400)
+        self.assertEqual(rejected.data, ["Only 1 items left in stock."])
+        self.assertEqual(CartItem.objects.get(cart=self.cart).quantity, 1)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Parallel checkouts, each in its own thread and database connection."""
+
+    def run_parallel(self, carts):
+        def checkout(cart):
+            try:
+                for attempt in range(100):
+                    try:
+                        OrderService.create_order(cart.user_id, cart.pk)
+                        return True
+                    except ValueError:
+                        return False
+                    except DatabaseError:
+                        # ---> Lock timeouts / "database is locked" are retryable
+                        time.sleep(random.uniform(0, 0.005 * 2 ** min(attempt, 5)))
+                raise AssertionError("checkout kept failing on database errors")
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(checkout, carts))
+
+    def test_no_oversell(self):
+        (stock,) = create_stocks(1, stock=5)
+        carts = []
+        for i in range(12):
+            cart = Cart.objects.create(
+                user=User.objects.create_user(email=f"shopper{i}@example.com")
+            )
+            fill_cart(cart, [stock])
+            carts.append(cart)
+
+        outcomes = self.run_parallel(carts)
+
+        stock.refresh_from_db()
+        self.assertEqual(outcomes.count(True), 5)
+        self.assertEqual(stock.stock, 0)
+        self.assertEqual(Order.objects.count(), 5)
+
+    def test_same_cart_is_ordered_once(self):
+        (stock,) = create_stocks(1, stock=5)
+        user = User.objects.create_user(email="shopper@example.com")
+        cart = Cart.objects.create(user=user)
+        fill_cart(cart, [stock])
+
+        outcomes = self.run_parallel([cart] * 4)
+
+        stock.refresh_from_db()
+        self.assertEqual(outcomes.count(True), 1)
+        self.assertEqual(stock.stock, 4)
+        self.assertEqual(Order.objects.filter(user=user).count(), 1)
+
+
+class BulkOrderStatusTests(TestCase):
+    url = "/api/v1/orders/bulk_update_status/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.shipped, cls.unpaid, cls.delivered = [
+            Order.objects.create(user=cls.user, total_price=100, status=status)
+            for status in (Order.SHIPPED, Order.NOT_PAID, Order.DELIVERED)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser(email="staff@example.com", password="x")
+        )
+
+    def post(self, data):
+        return self.client.post(self.url, data, format="json")
+
+    def statuses(self):
+        return dict(Order.objects.values_list("pk", "status"))
+
+    def test_reports_every_outcome_by_id(self):
+        missing = uuid4()
+        response = self.post(
+            {
+                "status": Order.DELIVERED,
+                "ids": [str(self.shipped.pk), str(self.unpaid.pk), str(missing)],
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"id": self.shipped.pk, "result": "updated", "from": Order.SHIPPED},
+                {
+                    "id": self.unpaid.pk,
+                    "result": "invalid_transition",
+                    "from": Order.NOT_PAID,
+                },
+                {"id": missing, "result": "not_found"},
+            ],
+        )
+        self.assertEqual(
+            self.statuses(),
+            {
+                self.shipped.pk: Order.DELIVERED,
+                self.unpaid.pk: Order.NOT_PAID,
+                self.delivered.pk: Order.DELIVERED,
+            },
+        )
+
+    def test_moves_the_filtered_orders_in_batches(self):
+        Order.objects.bulk_create(
+            Order(user=self.user, total_price=100, status=Order.NOT_PAID)
+            for _ in range(4)
+        )
+        unpaid = Order.objects.filter(status=Order.NOT_PAID)
+
+        previous = OrderService.bulk_update_status(
+            unpaid, Order.READY_TO_SHIP, batch_size=2
+        )
+
+        self.assertEqual(len(previous), 5)
+        self.assertFalse(unpaid.exists())
+        self.assertEqual(Order.objects.filter(status=Order.READY_TO_SHIP).count(), 5)
+
+    def test_unknown_filter_keys_are_rejected(self):
+        before = self.statuses()
+
+        misspelled = self.post(
+            {"status": Order.CANCELED, "filter": {"stauts": Order.NOT_PAID}}
+        )
+        blank = self.post({"status": Order.CANCELED, "filter": {"status": ""}})
+
+        self.assertEqual(misspelled.status_code, 400)
+        self.assertEqual(misspelled.data, {"filter": ["Unknown filter keys: stauts."]})
+        self.assertEqual(blank.status_code, 400)
+        self.assertEqual(self.statuses(), before)
+
+    def test_filter_matching_too_many_orders_is_rejected(self):
+        with mock.patch.object(BulkOrderStatusSerializer, "LIMIT", 2):
+            response = self.post(
+                {"status": Order.CANCELED, "filter": {"created_after": "2000-01-01"}}
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data, {"filter": ["Matches more than 2 orders, narrow it down."]}
+        )
+        self.assertFalse(Order.objects.filter(status=Order.CANCELED).exists())
+
+
+class SalesReportTests(TestCase):
+    url = "/api/v1/sales/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.first, cls.second = create_stocks(2)
+        # ---> Either side of midnight UTC, then one order canceled later
+        place_order(cls.user, {cls.first: 2}, datetime(2026, 3, 1, 23, 30, tzinfo=UTC))
+        place_order(
+            cls.user,
+            {cls.first: 1, cls.second: 3},
+            datetime(2026, 3, 2, 0, 30, tzinfo=UTC),
+        )
+        cls.canceled = place_order(
+            cls.user, {cls.second: 1}, datetime(2026, 3, 2, 10, 0, tzinfo=UTC)
+        )
+        # ---> Re-bucket by the backdated created_at, then cancel incrementally
+        SalesRollupService.rebuild()
+        OrderService.update_status(cls.canceled, Order.CANCELED)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_superuser(email="staff@example.com", password="x")
+        )
+
+    def rows(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [dict(row) for row in response.data["results"]]
+
+    def test_daily_rows_are_bucketed_by_order_day(self):
+        response = self.client.get(self.url, {"dimension": "stock"})
+
+        self.assertEqual(
+            self.rows(response),
+            [
+                {
+                    "id": self.first.pk,
+                    "units": 1,
+                    "revenue": Decimal("100.00"),
+                    "order_count": 1,
+                    "cancellations": 0,
+                    "day": "2026-03-02",
+                },
+                {
+                    "id": self.second.pk,
+                    "units": 3,
+                    "revenue": Decimal("300.00"),
+                    "order_count": 2,
+                    "cancellations": 1,
+                    "day": "2026-03-02",
+                },
+                {
+                    "id": self.first.pk,
+                    "units": 2,
+                    "revenue": Decimal("200.00"),
+                    "order_count": 1,
+                    "cancellations": 0,
+                    "day": "2026-03-01",
+                },
+            ],
+        )
+
+    def test_totals_over_a_date_range(self):
+        category_id = self.first.product.category_id
+
+        everything = self.client.get(f"{self.url}totals/")
+        first_day = self.client.get(
+            f"{self.url}totals/", {"start": "2026-03-01", "end": "2026-03-01"}
+        )
+
+        self.assertEqual(
+            self.rows(everything),
+            [
+                {
+                    "id": category_id,
+                    "units": 6,
+                    "revenue": Decimal("600.00"),
+                    "order_count": 3,
+                    "cancellations": 1,
+                }
+            ],
+        )
+        self.assertEqual(
+            [(row["units"], row["order_count"]) for row in self.rows(first_day)],
+            [(2, 1)],
+        )
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        def snapshot():
+            return {
+                model: sorted(
+                    model.objects.values_list(
+                        "day",
+                        column,
+                        "units",
+                        "revenue",
+                        "order_count",
+                        "cancellations",
+                    )
+                )
+                for model, column, _ in SalesRollupService.DIMENSIONS
+            }
+
+        incremental = snapshot()
+        SalesRollupService.rebuild()
+
+        self.assertEqual(snapshot(), incremental)
+
+
+class OrderExportTests(TestCase):
+    url = "/api/v1/orders/export/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="shopper@example.com")
+        cls.first, cls.second = create_stocks(2)
+        cls.march = place_order(
+            cls.user,
+            {cls.first: 2, cls.second: 1},
+            datetime(2026, 3, 1, 12, 0, tzinfo=UTC),
+        )
+        cls.april = place_order(
+            cls.user, {cls.second: 3}, datetime(2026, 4, 1, 12, 0, tzinfo=UTC)
+        )
+        OrderService.update_status(cls.april, Order.CANCELED)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(email="staff@example.com", is_staff=True)
+        )
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def csv_rows(self, **params):
+        return list(csv.reader(io.StringIO(self.export(**params))))
+
+    def test_csv_has_one_row_per_item(self):
+        header, *rows = self.csv_rows()
+
+        self.assertEqual(header, [name for name, _ in EXPORT_FIELDS])
+        first_item, second_item = OrderItem.objects.filter(order=self.march).order_by(
+            "pk"
+        )
+        self.assertEqual(
+            rows,
+            [
+                [
+                    str(self.march.pk),
+                    "2026-03-01T12:00:00+00:00",
+                    Order.NOT_PAID,
+                    "shopper@example.com",
+                    "300.00",
+                    str(first_item.pk),
+                    str(self.first.pk),
+                    "Product 0",
+                    "M",
+                    "2",
+                    "100.00",
+                    "200.00",
+                ],
+                [
+                    str(self.march.pk),
+                    "2026-03-01T12:00:00+00:00",
+                    Order.NOT_PAID,
+                    "shopper@example.com",
+                    "300.00",
+                    str(second_item.pk),
+                    str(self.second.pk),
+                    "Product 1",
+                    "M",
+                    "1",
+                    "100.00",
+                    "100.00",
+                ],
+                [
+                    str(self.april.pk),
+                    "2026-04-01T12:00:00+00:00",
+                    Order.CANCELED,
+                    "shopper@example.com",
+                    "300.00",
+                    str(OrderItem.objects.get(order=self.april).pk),
+                    str(self.second.pk),
+                    "Product 1",
+                    "M",
+                    "3",
+                    "100.00",
+                    "300.00",
+                ],
+            ],
+        )
+
+    def test_filters_narrow_the_export(self):
+        def order_ids(**params):
+            return {row[0] for row in self.csv_rows(**params)[1:]}
+
+        self.assertEqual(order_ids(status=Order.CANCELED), {str(self.april.pk)})
+        self.assertEqual(
+            order_ids(created_after="2026-03-15T00:00:00Z"), {str(self.april.pk)}
+        )
+        self.assertEqual(
+            order_ids(created_before="2026-03-15T00:00:00Z"), {str(self.march.pk)}
+        )
+        self.assertEqual(
+            order_ids(
+                created_after="2026-03-01T12:00:00Z",
+                created_before="2026-04-01T12:00:00Z",
+            ),
+            {str(self.march.pk)},
+        )
+
+    def test_ndjson_nests_the_items_of_each_order(self):
+        orders = [
+            json.loads(line) for line in self.export(output="ndjson").splitlines()
+        ]
+
+        self.assertEqual(
+            [(order["order_id"], len(order["items"])) for order in orders],
+            [(str(self.march.pk), 2), (str(self.april.pk), 1)],
+        )
+        self.assertEqual(orders[1]["items"][0]["quantity"], 3)
+
+    def test_bad_parameters_and_non_staff_are_refused(self):
+        bad_status = self.client.get(self.url, {"status": "Lost"})
+        bad_output = self.client.get(self.url, {"output": "xlsx"})
+        self.client.force_authenticate(self.user)
+        customer = self.client.get(self.url)
+
+        self.assertEqual(bad_status.status_code, 400)
+        self.assertEqual(bad_output.status_code, 400)
+        self.assertEqual(customer.status_code, 403)
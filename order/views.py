@@ -6,23 +6,46 @@ from rest_framework.mixins import (
 )
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
+from django_filters.utils import translate_validation
+from django.db.models import F, Sum
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 
-from order.models import Cart, CartItem, Order, Wishlist
+from api.idempotency import idempotent
+from order.exports import EXPORT_FORMATS
+from order.filters import OrderExportFilter, SalesReportFilter
+from order.models import (
+    Cart,
+    CartItem,
+    DailyCategorySales,
+    DailyProductSales,
+    DailyStockSales,
+    Order,
+    Wishlist,
+)
+from order.services import OrderService, StockHoldService, WishlistService
 from order.serializers import (
     CartSerializer,
     AddCartItemSerializer,
+    BulkAddCartItemSerializer,
     UpdateCartItemSerializer,
     CartItemSerializer,
     OrderSerializer,
     OrderCreateSerializer,
     UpdateOrderSerializer,
+    BulkOrderStatusSerializer,
     WishlistSerializer,
     WishlistProductSerializer,
+    SalesRollupSerializer,
+    SalesTotalSerializer,
 )
 from order import serializers as orderSz
 
 from product.models import Product
+from product.paginations import DefaultPagination, KeysetPagination
 
 
 class CartViewSet(
@@ -31,9 +54,7 @@ class CartViewSet(
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Cart.objects.none()
-        return Cart.objects.prefetch_related("items__product").filter(
-            user=self.request.user
-        )
+        return Cart.objects.with_items().filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -43,7 +64,7 @@ class CartViewSet(
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        existing_cart = Cart.objects.filter(user=request.user).first()
+        existing_cart = self.get_queryset().first()
         if existing_cart:
             serializer = self.get_serializer(existing_cart)
             return Response(serializer.data, status=200)
@@ -54,7 +75,7 @@ class CartItemViewSet(ModelViewSet):
     http_method_names = ["get", "post", "patch", "delete"]
 
     def get_queryset(self):
-        queryset = CartItem.objects.select_related("product").filter(
+        queryset = CartItem.objects.with_line_totals().filter(
             cart_id=self.kwargs.get("cart_pk")
         )
         return queryset
@@ -65,7 +86,27 @@ class CartItemViewSet(ModelViewSet):
             return context
         return {"cart_id": self.kwargs["cart_pk"]}
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent
+    def bulk(self, request, cart_pk=None):
+        cart = get_object_or_404(Cart.objects.only("id"), pk=cart_pk, user=request.user)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        cart = Cart.objects.with_items().get(pk=cart.pk)
+        return Response(CartSerializer(cart).data, status=200)
+
+    def perform_destroy(self, instance):
+        StockHoldService.release(instance.cart_id, instance.product_stock_id)
+        instance.delete()
+
     def get_serializer_class(self):
+        if self.action == "bulk":
+            return BulkAddCartItemSerializer
         if self.request.method == "POST":
             return AddCartItemSerializer
         elif self.request.method == "PATCH":
@@ -76,10 +117,14 @@ class CartItemViewSet(ModelViewSet):
 class OrderViewSet(ModelViewSet):
     http_method_names = ["get", "post", "delete", "patch", "head", "options"]
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
         order = self.get_object()
-        OrderService.cancel_order(order=order, user=request.user)
+        OrderService.cancel_Order(order=order, user=request.user)
         return Response({"status": "Order canceled"})
 
     @action(detail=True, methods=["patch"])
@@ -89,22 +134,90 @@ class OrderViewSet(ModelViewSet):
             order, data=request.data, partial=True
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        OrderService.update_status(
+            order, serializer.validated_data.get("status", order.status)
+        )
         return Response({"status": f"Order status updated to {request.data['status']}"})
 
+    @action(detail=False, methods=["post"])
+    def bulk_update_status(self, request):
+        """Move many orders (by ids or by export filter) to one status."""
+        serializer = BulkOrderStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data["status"]
+
+        ids = serializer.validated_data.get("ids")
+        if ids is not None:
+            orders = Order.objects.filter(pk__in=ids)
+        else:
+            filterset = OrderExportFilter(
+                serializer.validated_data["filter"], queryset=Order.objects.all()
+            )
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            orders = filterset.qs
+            limit = BulkOrderStatusSerializer.LIMIT
+            if orders[: limit + 1].count() > limit:
+                raise ValidationError(
+                    {"filter": [f"Matches more than {limit} orders, narrow it down."]}
+                )
+
+        previous = OrderService.bulk_update_status(orders, target)
+        sources = Order.sources_of(target)
+        results = []
+        for pk in ids if ids is not None else previous:
+            current = previous.get(pk)
+            if current is None:
+                results.append({"id": pk, "result": "not_found"})
+            elif current in sources:
+                results.append({"id": pk, "result": "updated", "from": current})
+            else:
+                results.append(
+                    {"id": pk, "result": "invalid_transition", "from": current}
+                )
+        return Response(
+            {
+                "status": target,
+                "updated": sum(result["result"] == "updated" for result in results),
+                "results": results,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream orders and their items as CSV or NDJSON (?output=csv|ndjson)."""
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=400,
+            )
+        filterset = OrderExportFilter(
+            request.query_params, queryset=Order.objects.all()
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+
+        stream, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(
+            stream(filterset.qs), content_type=content_type
+        )
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
     def get_permissions(self):
-        if self.action in ["update_status", "destroy"]:
+        if self.action in ["update_status", "bulk_update_status", "destroy", "export"]:
             return [IsAdminUser()]
         return [IsAuthenticated()]
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False):
             return Order.objects.none()
+        queryset = Order.objects.prefetch_related("items__product_stock__product")
         if self.request.user.is_staff:
-            return Order.objects.prefetch_related("items__product").all()
-        return Order.objects.prefetch_related("items__product").filter(
-            user=self.request.user
-        )
+            return queryset.all()
+        return queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == "cancel":
@@ -124,6 +237,7 @@ class OrderViewSet(ModelViewSet):
 class WishlistViewSet(GenericViewSet):
     serializer_class = WishlistSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """DRF requirement, not used directly. Short-circuit for schema generation and anonymous users."""
@@ -140,30 +254,101 @@ class WishlistViewSet(GenericViewSet):
         return wishlist
 
     def list(self, request, *args, **kwargs):
-        """GET /wishlists/ - List all products in the user's wishlist."""
-        wishlist = self.get_object()
-        products = wishlist.products.all()
-        serializer = WishlistProductSerializer(products, many=True)
-        return Response(serializer.data)
+        """
+        GET /wishlists/ - Products in the user's wishlist, most recently added
+        first and cursor paginated. ?ids_only=1 returns just the product ids.
+        """
+        if request.query_params.get("ids_only", "").lower() in ("1", "true", "yes"):
+            ids = WishlistService.get_product_ids(request.user)
+            return Response({"ids": sorted(ids)})
+
+        entries = (
+            Wishlist.products.through.objects.filter(wishlist__user=request.user)
+            .select_related("product")
+            .only("id", "product__id", "product__name")
+            .order_by("-id")
+        )
+        page = self.paginate_queryset(entries)
+        serializer = WishlistProductSerializer(
+            [entry.product for entry in page], many=True
+        )
+        return self.get_paginated_response(serializer.data)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         """GET /wishlists/{product_id}/ - Get a single product from the user's wishlist."""
-        wishlist = self.get_object()
-        try:
-            product = wishlist.products.get(pk=pk)
-        except Product.DoesNotExist:
+        product = (
+            Product.objects.filter(pk=pk, wishlisted_by__user=request.user)
+            .only("id", "name")
+            .first()
+            if pk.isdigit()
+            else None
+        )
+        if product is None:
             return Response({"detail": "Product not found in wishlist."}, status=404)
         serializer = WishlistProductSerializer(product)
         return Response(serializer.data)
 
     def destroy(self, request, pk=None, *args, **kwargs):
         """DELETE /wishlists/{product_id}/ - Remove a product from the user's wishlist."""
-        wishlist = self.get_object()
-        try:
-            product = wishlist.products.get(pk=pk)
-        except Product.DoesNotExist:
+        if not pk.isdigit() or not WishlistService.remove(request.user, int(pk)):
             return Response({"detail": "Product not found in wishlist."}, status=404)
-        wishlist.products.remove(product)
-        products = wishlist.products.all()
-        serializer = WishlistProductSerializer(products, many=True)
-        return Response(serializer.data, status=200)
+        return Response(status=204)
+
+
+class SalesReportViewSet(GenericViewSet):
+    """
+    Staff sales dashboards served from the daily rollup tables, so a report
+    costs O(days) rows however many orders were placed.
+     - ?dimension=category|product|stock (default: category)
+     - ?start= / ?end= (dates, inclusive) and ?id= to narrow the report
+    """
+
+    permission_classes = [IsAdminUser]
+    pagination_class = DefaultPagination
+    serializer_class = SalesRollupSerializer
+
+    ROLLUPS = {
+        "category": (DailyCategorySales, "category_id"),
+        "product": (DailyProductSales, "product_id"),
+        "stock": (DailyStockSales, "product_stock_id"),
+    }
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return DailyCategorySales.objects.none()
+        dimension = self.request.query_params.get("dimension", "category")
+        if dimension not in self.ROLLUPS:
+            raise ValidationError(
+                {"dimension": f"Must be one of: {', '.join(self.ROLLUPS)}."}
+            )
+        model, column = self.ROLLUPS[dimension]
+        filterset = SalesReportFilter(
+            self.request.query_params,
+            queryset=model.objects.annotate(key=F(column)),
+        )
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return filterset.qs
+
+    def list(self, request):
+        """Daily rows, newest first."""
+        queryset = self.get_queryset().order_by("-day", "key")
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(SalesRollupSerializer(page, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def totals(self, request):
+        """Totals per category / product / stock over the range, top revenue first."""
+        queryset = (
+            self.get_queryset()
+            .values("key")
+            .annotate(
+                units=Sum("units"),
+                revenue=Sum("revenue"),
+                order_count=Sum("order_count"),
+                cancellations=Sum("cancellations"),
+            )
+            .order_by("-revenue", "key")
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(SalesTotalSerializer(page, many=True).data)
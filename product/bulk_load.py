@@ -0,0 +1,176 @@
+import json
+import time
+
+from django.core.management.color import no_style
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.db import connection, transaction
+
+from product.caching import bump_catalog_version
+from product.models import Category, Product, ProductImage, ProductStock, Review
+from product.search import update_search_index
+from product.services import ReviewService
+
+LOADABLE_MODELS = (Category, Product, ProductStock, ProductImage, Review)
+
+
+def iter_json_array(file, read_size=1 << 16):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    opened = False
+    while True:
+        buffer = buffer.lstrip()
+        if not opened and buffer:
+            if buffer[0] != "[":
+                raise ValueError("Expected a JSON array of fixture objects.")
+            buffer, opened = buffer[1:], True
+            continue
+        if opened and buffer.startswith(","):
+            buffer = buffer[1:]
+            continue
+        if opened and buffer.startswith("]"):
+            return
+        try:
+            if not buffer:
+                raise json.JSONDecodeError("Empty buffer", buffer, 0)
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(read_size)
+            if not chunk:
+                raise ValueError("Unexpected end of fixture file.")
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_records(path):
+    with open(path, encoding="utf-8") as file:
+        if path.endswith((".ndjson", ".jsonl")):
+            yield from iter_ndjson(file)
+        else:
+            yield from iter_json_array(file)
+
+
+class CatalogLoader:
+    """
+    Streams fixture / NDJSON records into the catalog tables.
+     - Records are deserialized one by one into per-model buffers of at
+       most `chunk_size` objects, so memory stays flat whatever the file size
+     - Foreign keys of a chunk are checked with one query per relation
+     - Each chunk is written with multi-row raw INSERTs inside its own
+       transaction; like `loaddata`, raw values skip pre_save, so loaded
+       created_at / updated_at are kept instead of being set to now()
+     - Denormalized columns (stock summaries, category counters, review
+       aggregates, search index) are refreshed once at the end, without
+       touching updated_at
+    """
+
+    def __init__(self, chunk_size=5000, skip_missing=False, log=None):
+        self.chunk_size = chunk_size
+        self.skip_missing = skip_missing
+        self.log = log or (lambda message: None)
+        self.counts = {}
+        self.skipped = 0
+
+    def load(self, paths):
+        self.started = time.perf_counter()
+        buffers = {model: [] for model in LOADABLE_MODELS}
+        for path in paths:
+            for record in PythonDeserializer(
+                iter_records(path), ignorenonexistent=True
+            ):
+                model = type(record.object)
+                if model not in buffers:
+                    raise ValueError(f"{model._meta.label} can't be bulk loaded.")
+                buffers[model].append(record.object)
+                if len(buffers[model]) >= self.chunk_size:
+                    self.flush(buffers, upto=model)
+        self.flush(buffers)
+        self.finish()
+        return self.counts, time.perf_counter() - self.started
+
+    def flush(self, buffers, upto=None):
+        # ---> Parents are written before children, so a child chunk never
+        #      references a row that is still sitting in a buffer
+        for model in LOADABLE_MODELS:
+            if buffers[model]:
+                self.insert(model, buffers[model])
+                buffers[model] = []
+            if model is upto:
+                break
+
+    def insert(self, model, chunk):
+        chunk = self.resolve_foreign_keys(model, chunk)
+        fields = model._meta.local_concrete_fields
+        # ---> Rows without a pk let the database assign it
+        with_pk = [obj for obj in chunk if obj.pk is not None]
+        without_pk = [obj for obj in chunk if obj.pk is None]
+        with transaction.atomic():
+            self.insert_raw(model, with_pk, fields)
+            self.insert_raw(
+                model, without_pk, [f for f in fields if f is not model._meta.pk]
+            )
+        self.counts[model] = self.counts.get(model, 0) + len(chunk)
+        total = sum(self.counts.values())
+        elapsed = time.perf_counter() - self.started
+        self.log(
+            f"{model._meta.label}: {self.counts[model]} rows "
+            f"({total / elapsed:.0f} rows/s overall)"
+        )
+
+    def insert_raw(self, model, objs, fields):
+        if not objs:
+            return
+        batch_size = min(self.chunk_size, connection.ops.bulk_batch_size(fields, objs))
+        for start in range(0, len(objs), batch_size):
+            model._base_manager._insert(
+                objs[start : start + batch_size], fields=fields, raw=True
+            )
+
+    def resolve_foreign_keys(self, model, chunk):
+        for field in model._meta.concrete_fields:
+            if not field.is_relation:
+                continue
+            values = {getattr(obj, field.attname) for obj in chunk} - {None}
+            existing = set(
+                field.related_model._base_manager.filter(pk__in=values).values_list(
+                    "pk", flat=True
+                )
+            )
+            missing = values - existing
+            if not missing:
+                continue
+            if not self.skip_missing:
+                raise ValueError(
+                    f"{model._meta.label}.{field.name} references missing "
+                    f"{field.related_model._meta.label} ids: {sorted(missing)[:10]}"
+                )
+            kept = [obj for obj in chunk if getattr(obj, field.attname) not in missing]
+            self.skipped += len(chunk) - len(kept)
+            chunk = kept
+        return chunk
+
+    def finish(self):
+        loaded = set(self.counts)
+        if not loaded:
+            return
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(loaded)):
+                cursor.execute(sql)
+
+        self.log("Refreshing denormalized columns...")
+        if loaded & {Product, ProductStock}:
+            Product.objects.all().refresh_stock_summary(touch=False)
+        if loaded & {Product, Review}:
+            ReviewService.rebuild()
+        if loaded & {Category, Product}:
+            update_search_index()
+        Category.objects.all().refresh_product_counts(touch=False)
+        bump_catalog_version()
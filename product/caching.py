@@ -0,0 +1,209 @@
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, timeout=None)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def product_version_key(product_id):
+    return f"catalog:product:{product_id}"
+
+
+def get_product_versions(product_ids):
+    """Return {key: token} of the products' version keys, creating missing ones."""
+    keys = [product_version_key(pk) for pk in product_ids]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def bump_product_versions(product_ids):
+    """
+    Invalidate the cached catalog responses that show these products once the
+    current transaction commits, leaving the rest of the catalog cached.
+    """
+    keys = [product_version_key(pk) for pk in product_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CatalogCacheMixin:
+    """
+    Caches the shared (user independent) body of list/retrieve responses.
+     - Keys are built from the catalog version, the view, the path and the
+       normalized query parameters, so a version bump invalidates everything
+     - Entries also record the version of every product they show (see
+       `get_cached_product_ids`), so stock-only updates, which only bump
+       those products' versions, invalidate just the responses showing them
+       (versions are read after rendering, so a stock write racing a render
+       can leave that entry stale for up to `cache_timeout`)
+     - The body is rendered with `shared_response` in the serializer context;
+       views add per-user fields back in `personalize_response`
+     - Only successful JSON responses are cached
+    """
+
+    cache_timeout = getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+    shared_response = False
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.shared_response:
+            context["shared_response"] = True
+        return context
+
+    def get_cache_key(self, request):
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+            if any(values)
+        )
+        digest = hashlib.sha1(repr((request.path, params)).encode("utf-8")).hexdigest()
+        return f"catalog:{get_catalog_version()}:{self.basename}:{self.action}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry and entry["versions"]:
+            if cache.get_many(entry["versions"]) != entry["versions"]:
+                entry = None
+        status = "HIT"
+        if entry is None:
+            status = "MISS"
+            self.shared_response = True
+            try:
+                response = handler(request, *args, **kwargs)
+            finally:
+                self.shared_response = False
+            if response.status_code != 200:
+                return response
+            data = response.data
+            versions = get_product_versions(self.get_cached_product_ids(data))
+            cache.set(key, {"data": data, "versions": versions}, self.cache_timeout)
+        else:
+            data = entry["data"]
+
+        response = Response(self.personalize_response(request, data))
+        response["X-Cache"] = status
+        return response
+
+    def get_cached_product_ids(self, data):
+        """Products shown by a response body, by default the parent product of nested routes."""
+        product_id = self.kwargs.get("product_pk")
+        return [product_id] if product_id is not None else []
+
+    def personalize_response(self, request, data):
+        return data
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETag / Last-Modified validators to list and retrieve.
+     - Validators come from `get_validator_state` (max(updated_at) and row
+       counts), never from the serialized body
+     - Lists only get an ETag: deleting a row doesn't move max(updated_at),
+       so a list Last-Modified would answer 304 to a stale client
+     - If-None-Match / If-Modified-Since short-circuit to 304 before the
+       serializer (or the response cache) runs
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_validator_state(self, request):
+        """Return (last_modified, fingerprint) or None when no validator applies."""
+        if self.action == "retrieve":
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            updated_at = (
+                self.get_queryset()
+                .filter(**{self.lookup_field: lookup})
+                .values_list("updated_at", flat=True)
+                .first()
+            )
+            if updated_at is None:
+                return None
+            return updated_at, ()
+
+        state = self.filter_queryset(self.get_queryset()).aggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+        last_modified = state["last_modified"]
+        return None, (
+            last_modified.isoformat() if last_modified else None,
+            state["count"],
+        )
+
+    def get_etag_extra(self, request):
+        """Per-user state that changes the body (e.g. wishlist flags)."""
+        return ()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        state = self.get_validator_state(request)
+        if state is None:
+            return handler(request, *args, **kwargs)
+
+        last_modified, fingerprint = state
+        params = sorted(request.query_params.lists())
+        payload = repr(
+            (
+                request.path,
+                params,
+                request.accepted_renderer.format,
+                last_modified.isoformat() if last_modified else None,
+                fingerprint,
+                self.get_etag_extra(request),
+            )
+        )
+        etag = '"%s"' % hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_vary_headers(response, ["Accept", "Authorization"])
+        return response
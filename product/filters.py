@@ -4,9 +4,10 @@ from product.models import Product
 
 
 class ProductFilter(FilterSet):
-    min_price = NumberFilter(field_name="stocks__price", lookup_expr="gte")
-    max_price = NumberFilter(field_name="stocks__price", lookup_expr="lte")
+    # ---> A product matches when any of its sizes falls inside the price range
+    min_price = NumberFilter(field_name="max_price", lookup_expr="gte")
+    max_price = NumberFilter(field_name="min_price", lookup_expr="lte")
 
     class Meta:
         model = Product
-        fields = {"category_id": ["exact"]}
+        fields = {"category_id": ["exact"], "in_stock": ["exact"]}
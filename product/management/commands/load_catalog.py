@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from product.bulk_load import CatalogLoader
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream-load Category / Product / ProductStock / ProductImage / Review "
+        "records from fixture (.json) or NDJSON (.ndjson, .jsonl) files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Fixture or NDJSON files.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows inserted per transaction (default: 5000).",
+        )
+        parser.add_argument(
+            "--skip-missing",
+            action="store_true",
+            help="Drop rows whose foreign keys don't exist instead of failing.",
+        )
+
+    def handle(self, *args, **options):
+        loader = CatalogLoader(
+            chunk_size=options["chunk_size"],
+            skip_missing=options["skip_missing"],
+            log=self.stdout.write,
+        )
+        try:
+            counts, elapsed = loader.load(options["paths"])
+        except (OSError, ValueError, IntegrityError) as e:
+            raise CommandError(str(e))
+
+        total = sum(counts.values())
+        for model, count in counts.items():
+            self.stdout.write(f"  {model._meta.label}: {count}")
+        if loader.skipped:
+            self.stdout.write(f"  skipped (missing foreign keys): {loader.skipped}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {total} rows in {elapsed:.1f}s "
+                f"({total / elapsed if elapsed else 0:.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from product.models import Category
+
+
+class Command(BaseCommand):
+    help = "Reconcile the maintained product / in-stock counters on categories."
+
+    def handle(self, *args, **options):
+        updated = Category.objects.all().refresh_product_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt product counts for {updated} categories.")
+        )
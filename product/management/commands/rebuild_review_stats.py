@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from product.services import ReviewService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized review count / rating aggregates on products."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of products updated per statement (default: 1000).",
+        )
+        parser.add_argument(
+            "--product",
+            type=int,
+            action="append",
+            dest="product_ids",
+            help="Only rebuild the given product id (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        updated = ReviewService.rebuild(
+            product_ids=options["product_ids"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt review aggregates for {updated} products.")
+        )
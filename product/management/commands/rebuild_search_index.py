@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from product.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index (tsvector or SQLite FTS5)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of products indexed per statement on SQLite (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        indexed = update_search_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products."))
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:52
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_review_aggregates(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Review = apps.get_model("product", "Review")
+    reviews = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    Product.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(c=Count("id")).values("c")), 0),
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(s=Sum("rating")).values("s")),
+            0,
+            output_field=models.DecimalField(max_digits=12, decimal_places=1),
+        ),
+        rating_average=Coalesce(
+            Subquery(reviews.annotate(a=Round(Avg("rating"), 1)).values("a")),
+            0,
+            output_field=models.DecimalField(max_digits=2, decimal_places=1),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="rating_average",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=2
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_sum",
+            field=models.DecimalField(
+                decimal_places=1, default=0, editable=False, max_digits=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_review_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:55
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS product_search_vector_gin "
+            "ON product_product USING gin (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE product_product p SET search_vector = "
+            "setweight(to_tsvector('english', COALESCE(p.name, '')), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(p.description, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(c.name, '')), 'C') "
+            "FROM product_category c WHERE c.id = p.category_id"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_product_fts "
+            "USING fts5(name, description, category, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO product_product_fts (rowid, name, description, category) "
+            "SELECT p.id, p.name, COALESCE(p.description, ''), c.name "
+            "FROM product_product p JOIN product_category c ON c.id = p.category_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS product_search_vector_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS product_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0003_product_review_aggregates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
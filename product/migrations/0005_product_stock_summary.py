@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:56
+
+from django.db import migrations, models
+from django.db.models import Exists, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_stock_summary(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    ProductStock = apps.get_model("product", "ProductStock")
+    stocks = (
+        ProductStock.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    )
+
+    def aggregate(function, field):
+        return Coalesce(
+            Subquery(stocks.annotate(value=function(field)).values("value")), 0
+        )
+
+    Product.objects.update(
+        min_price=aggregate(Min, "price"),
+        max_price=aggregate(Max, "price"),
+        total_stock=aggregate(Sum, "stock"),
+        in_stock=Exists(stocks.filter(stock__gt=0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0004_product_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="in_stock",
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="max_price",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="min_price",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="total_stock",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["created_at", "id"], name="product_pro_created_fbec9b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["min_price", "id"], name="product_pro_min_pri_405190_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["max_price", "id"], name="product_pro_max_pri_5d1f5d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["rating_average", "id"], name="product_pro_rating__7d4361_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_stock_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_category_counts(apps, schema_editor):
+    Category = apps.get_model("product", "Category")
+    Product = apps.get_model("product", "Product")
+    products = (
+        Product.objects.filter(category=OuterRef("pk")).order_by().values("category")
+    )
+
+    def count(queryset):
+        return Coalesce(
+            Subquery(queryset.annotate(value=Count("pk")).values("value")), 0
+        )
+
+    Category.objects.update(
+        product_count=count(products),
+        in_stock_count=count(products.filter(in_stock=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0006_category_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="in_stock_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="product_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "in_stock"], name="product_pro_categor_a0f81f_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_category_counts, migrations.RunPython.noop),
+    ]
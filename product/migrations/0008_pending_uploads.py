@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0007_category_product_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="spooled_file",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="upload_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="upload_retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="upload_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="ready",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="reviewimage",
+            name="spooled_file",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="reviewimage",
+            name="upload_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="reviewimage",
+            name="upload_retry_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="reviewimage",
+            name="upload_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="ready",
+                max_length=10,
+            ),
+        ),
+    ]
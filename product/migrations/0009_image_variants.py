@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0008_pending_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="reviewimage",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,17 +1,59 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from decimal import Decimal, ROUND_HALF_UP
 
+from api.models import PendingUpload
+from product.caching import bump_catalog_version, bump_product_versions
 from product.validators import validate_file_size
 from cloudinary.models import CloudinaryField
 
 
+class CategoryQuerySet(models.QuerySet):
+    def refresh_product_counts(self, touch=True):
+        """
+        Recount products (and in-stock products) per category, set based.
+        `touch=False` keeps updated_at, e.g. when loading fixtures.
+        """
+        products = (
+            Product.objects.filter(category=models.OuterRef("pk"))
+            .order_by()
+            .values("category")
+        )
+
+        def count(queryset):
+            return Coalesce(
+                models.Subquery(
+                    queryset.annotate(value=models.Count("pk")).values("value")
+                ),
+                0,
+            )
+
+        touched = {"updated_at": timezone.now()} if touch else {}
+        return self.update(
+            product_count=count(products),
+            in_stock_count=count(products.filter(in_stock=True)),
+            **touched,
+        )
+
+
 class Category(models.Model):
     """Product category."""
 
     name = models.CharField(max_length=50)
     description = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # ---> Maintained counters, see CategoryQuerySet and product.signals
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    in_stock_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CategoryQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -22,9 +64,76 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
 
 
+class ProductQuerySet(models.QuerySet):
+    def refresh_stock_summary(self, touch=True, batch_size=1000):
+        """
+        Recompute min/max price, total stock and availability from ProductStock.
+        Returns how many products' availability (in_stock) flipped.
+        `touch=False` keeps updated_at, e.g. when loading fixtures.
+        Works through the products in pk order, `batch_size` rows per
+        transaction, so whole-table refreshes hold a bounded set of rows.
+        """
+        stocks = (
+            ProductStock.objects.filter(product=models.OuterRef("pk"))
+            .order_by()
+            .values("product")
+        )
+
+        def aggregate(function, field):
+            return Coalesce(
+                models.Subquery(stocks.annotate(value=function(field)).values("value")),
+                0,
+            )
+
+        touched = {"updated_at": timezone.now()} if touch else {}
+        flipped = 0
+        last = None
+        while True:
+            batch = self.select_for_update().order_by("pk")
+            if last is not None:
+                batch = batch.filter(pk__gt=last)
+            rows = batch.values_list("pk", "category_id", "in_stock")[:batch_size]
+            with transaction.atomic():
+                # ---> Lock the rows so in-stock flips are counted exactly once
+                before = {
+                    pk: (category_id, in_stock) for pk, category_id, in_stock in rows
+                }
+                if not before:
+                    return flipped
+                products = Product.objects.filter(pk__in=before)
+                products.update(
+                    min_price=aggregate(models.Min, "price"),
+                    max_price=aggregate(models.Max, "price"),
+                    total_stock=aggregate(models.Sum, "stock"),
+                    in_stock=models.Exists(stocks.filter(stock__gt=0)),
+                    **touched,
+                )
+                deltas = Counter()
+                for pk, in_stock in products.values_list("pk", "in_stock"):
+                    category_id, was_in_stock = before[pk]
+                    if in_stock != was_in_stock:
+                        deltas[category_id] += 1 if in_stock else -1
+                        flipped += 1
+                for category_id, delta in deltas.items():
+                    if delta:
+                        Category.objects.filter(pk=category_id).update(
+                            in_stock_count=models.F("in_stock_count") + delta,
+                            **touched,
+                        )
+            if len(before) < batch_size:
+                return flipped
+            last = max(before)
+
+    def touch(self):
+        """Bump updated_at so HTTP validators notice changes to child rows."""
+        return self.update(updated_at=timezone.now())
+
+
 class Product(models.Model):
     """Product in the store."""
 
+    STOCK_SUMMARY_FIELDS = ["min_price", "max_price", "total_stock", "in_stock"]
+
     name = models.CharField(max_length=150)
     description = models.TextField(blank=True, null=True)
     video_url = models.URLField(
@@ -38,35 +147,118 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # ---> Denormalized review aggregates, maintained by ReviewService
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.DecimalField(
+        max_digits=12, decimal_places=1, default=0, editable=False
+    )
+    rating_average = models.DecimalField(
+        max_digits=2, decimal_places=1, default=0, editable=False
+    )
+
+    # ---> Denormalized ProductStock summary, see ProductQuerySet.refresh_stock_summary
+    min_price = models.PositiveIntegerField(default=0, editable=False)
+    max_price = models.PositiveIntegerField(default=0, editable=False)
+    total_stock = models.PositiveIntegerField(default=0, editable=False)
+    in_stock = models.BooleanField(default=False, editable=False, db_index=True)
+
+    # ---> Full-text index over name, description and category name (see product.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # ---> Remember the stored category so moves can update both counters
+        instance._loaded_category_id = instance.__dict__.get("category_id")
+        return instance
+
     def is_in_stock(self):
         """Return True if any size is in stock."""
-        return self.stocks.filter(stock__gt=0).exists()
-
-    @property
-    def total_stock(self):
-        return self.stocks.aggregate(total=models.Sum("stock"))["total"] or 0
-
+        return self.in_stock
 
     def total_reviews(self):
         """Return the total number of reviews for this product."""
-        return self.review_set.count()
+        return self.review_count
 
     def average_rating(self):
         """Return the average rating for this product, rounded to 1 decimal or 0 if no reviews."""
-        avg = self.review_set.aggregate(avg_rating=Avg("rating"))["avg_rating"]
-        if avg is None:
+        if not self.review_count:
             return 0
-        return float(f"{avg:.1f}")
+        return float(self.rating_average)
+
+    def apply_review_delta(self, count_delta, rating_delta):
+        """Shift the stored review aggregates and recompute the average."""
+        self.review_count += count_delta
+        self.rating_sum += rating_delta
+        if self.review_count > 0:
+            self.rating_average = (self.rating_sum / self.review_count).quantize(
+                Decimal("0.1"), rounding=ROUND_HALF_UP
+            )
+        else:
+            self.review_count = 0
+            self.rating_sum = Decimal("0")
+            self.rating_average = Decimal("0")
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["min_price", "id"]),
+            models.Index(fields=["max_price", "id"]),
+            models.Index(fields=["rating_average", "id"]),
+            models.Index(fields=["category", "in_stock"]),
+        ]
         verbose_name = "Product"
         verbose_name_plural = "Products"
 
 
+class ProductStockQuerySet(models.QuerySet):
+    """
+    Keeps the Product stock summary in sync for bulk writes, which bypass the
+    post_save / post_delete signals handled in product.signals.
+     - Writes that only change `stock` (e.g. checkout decrements) invalidate
+       the cached responses of the affected products, unless a product went
+       in or out of stock, which changes filtered lists and category counters
+     - Every other write invalidates the whole catalog cache
+    """
+
+    STOCK_ONLY_FIELDS = {"stock"}
+
+    def _refresh_products(self, product_ids, stock_only=False):
+        if product_ids:
+            flipped = Product.objects.filter(pk__in=product_ids).refresh_stock_summary()
+            if stock_only and not flipped:
+                bump_product_versions(product_ids)
+            else:
+                bump_catalog_version()
+
+    def update(self, **kwargs):
+        product_ids = set(self.values_list("product_id", flat=True))
+        rows = super().update(**kwargs)
+        if "product" in kwargs or "product_id" in kwargs:
+            product = kwargs.get("product_id", kwargs.get("product"))
+            product_ids.add(getattr(product, "pk", product))
+        self._refresh_products(product_ids, set(kwargs) <= self.STOCK_ONLY_FIELDS)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._refresh_products({obj.product_id for obj in objs})
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self._refresh_products(
+            {obj.product_id for obj in objs}, set(fields) <= self.STOCK_ONLY_FIELDS
+        )
+        return rows
+
+
 class ProductStock(models.Model):
     SIZE_CHOICES = [
         ("XS", "XS"),
@@ -83,6 +275,8 @@ class ProductStock(models.Model):
     price = models.PositiveIntegerField()
     stock = models.PositiveIntegerField(default=0)
 
+    objects = ProductStockQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.product.name} - {self.size}: {self.stock} pcs"
 
@@ -92,7 +286,7 @@ class ProductStock(models.Model):
         verbose_name_plural = "Product Stocks"
 
 
-class ProductImage(models.Model):
+class ProductImage(PendingUpload):
     product = models.ForeignKey(
         Product,
         on_delete=models.CASCADE,
@@ -129,7 +323,7 @@ class Review(models.Model):
         return f"Review of {self.product.name} by {self.user.first_name} {self.user.last_name}"
 
 
-class ReviewImage(models.Model):
+class ReviewImage(PendingUpload):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
@@ -1,5 +1,243 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 10
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination over the full ordering tuple.
+     - Always appends the primary key as a tie breaker, e.g. (created_at, id)
+     - Honours the ordering applied by the view's filters (e.g. ?ordering=price
+       or the search rank), falling back to `ordering`
+     - Cursors are opaque and stable: they carry the ordering and the last seen
+       key values, never an offset, so no OFFSET scan is needed on deep pages
+     - The total count is returned unless the client passes ?count=false
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at",)
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_keyset_ordering(request, queryset, view)
+        self.count = self.get_count(queryset) if self.include_count(request) else None
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["r"])
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(ordering, cursor["v"]))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        return self.page
+
+    def get_keyset_ordering(self, request, queryset, view):
+        # ---> Filters that order the queryset (OrderingFilter, search rank) win
+        ordering = [f for f in queryset.query.order_by if isinstance(f, str)]
+        if not ordering:
+            ordering = list(self.get_ordering(request, queryset, view))
+        if not any(field.lstrip("-") in ("pk", "id") for field in ordering):
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+        return tuple(ordering)
+
+    def get_keyset_filter(self, ordering, values):
+        """Build `(a, b, c) > (va, vb, vc)` honouring each field's direction."""
+        clauses = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = [Q(**{f.lstrip("-"): v}) for f, v in zip(ordering[:index], values)]
+            clauses.append(
+                reduce(and_, equal + [Q(**{f"{name}__{lookup}": values[index]})])
+            )
+        return reduce(or_, clauses)
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("0", "false", "no")
+
+    def get_count(self, queryset):
+        return queryset.order_by().count()
+
+    def get_key_values(self, instance):
+        return [
+            _encode_value(getattr(instance, field.lstrip("-")))
+            for field in self.ordering
+        ]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(
+                urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8")
+            )
+            valid = (
+                isinstance(cursor, dict)
+                and cursor.get("o") == list(self.ordering)
+                and isinstance(cursor.get("v"), list)
+                and len(cursor["v"]) == len(self.ordering)
+            )
+        except (TypeError, ValueError, UnicodeError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, cursor):
+        payload = json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+        encoded = urlsafe_b64encode(payload).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        values = self.get_key_values(self.page[-1])
+        return self.encode_cursor({"o": list(self.ordering), "v": values, "r": 0})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        values = self.get_key_values(self.page[0])
+        return self.encode_cursor({"o": list(self.ordering), "v": values, "r": 1})
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            **response_schema["properties"],
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pass `false` to skip the total count.",
+                "schema": {"type": "boolean"},
+            }
+        )
+        return parameters
+
+
+class CatalogPagination(BasePagination):
+    """
+    Page-number pagination (?page=N) by default, keyset pagination on request.
+     - A request carrying ?cursor, or opting in with ?pagination=cursor, is
+       paginated by `keyset_class`; every other request by `page_class`, so
+       existing ?page=N clients keep working
+     - The links of a keyset page carry ?cursor, so following them stays in
+       keyset mode
+    """
+
+    page_class = DefaultPagination
+    keyset_class = KeysetPagination
+    mode_query_param = "pagination"
+    page_size_query_param = KeysetPagination.page_size_query_param
+
+    def __init__(self):
+        self.paginator = self.page_class()
+
+    def use_keyset(self, request):
+        return (
+            self.keyset_class.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.paginator = self.keyset_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pass `cursor` for keyset pagination.",
+                "schema": {"type": "string", "enum": ["page", "cursor"]},
+            }
+        ]
+        for paginator in (self.page_class(), self.keyset_class()):
+            parameters += paginator.get_schema_operation_parameters(view)
+        return parameters
+
+
+def _reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith("-") else f"-{field}" for field in ordering
+    )
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
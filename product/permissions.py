@@ -14,4 +14,4 @@ class IsReviewAuthorOrReadonly(permissions.BasePermission):
         if request.user.is_staff:
             return True
 
-        return obj.user == request.user
+        return obj.user_id == request.user.id
@@ -0,0 +1,117 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+from product.models import Category, Product
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "product_product_fts"  # ---> SQLite FTS5 shadow table (local runs)
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def product_search_vector():
+    """Weighted tsvector over name (A), description (B) and category name (C)."""
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef("category_id"))
+        .order_by()
+        .values("name")[:1]
+    )
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(product_ids=None, category_id=None, batch_size=1000):
+    """Refresh the search index rows of the given products (or a whole category)."""
+    queryset = Product.objects.all()
+    if product_ids is not None:
+        queryset = queryset.filter(pk__in=product_ids)
+    if category_id is not None:
+        queryset = queryset.filter(category_id=category_id)
+
+    if connection.vendor == "postgresql":
+        return queryset.update(search_vector=product_search_vector())
+    if connection.vendor != "sqlite":
+        return 0
+
+    updated = 0
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(pks), batch_size):
+        chunk = pks[start : start + batch_size]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+                "SELECT p.id, p.name, COALESCE(p.description, ''), c.name "
+                "FROM product_product p JOIN product_category c ON c.id = p.category_id "
+                f"WHERE p.id IN ({placeholders})",
+                chunk,
+            )
+        updated += len(chunk)
+    return updated
+
+
+def remove_from_search_index(product_id):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Ranked full-text search for ?search=...
+     - PostgreSQL: tsvector column with a GIN index, ranked with ts_rank
+     - SQLite: FTS5 shadow table, ranked with bm25
+     - Every term is prefix-matched so results update while the user types
+     - Results are ordered by rank unless an explicit ?ordering= is given
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = [
+            term
+            for search_term in self.get_search_terms(request)
+            for term in _TERM_RE.findall(search_term)
+        ]
+        if not terms:
+            return queryset
+
+        if connection.vendor == "postgresql":
+            query = SearchQuery(
+                " & ".join(f"{term}:*" for term in terms),
+                search_type="raw",
+                config=SEARCH_CONFIG,
+            )
+            queryset = queryset.filter(search_vector=query).annotate(
+                search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+            )
+        elif connection.vendor == "sqlite":
+            match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+            table = Product._meta.db_table
+            queryset = queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                    (match,),
+                )
+            ).annotate(
+                search_rank=RawSQL(
+                    f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                    f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            )
+        else:
+            return super().filter_queryset(request, queryset, view)
+
+        return queryset.order_by("-search_rank")
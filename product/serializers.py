@@ -8,7 +8,8 @@ from product.models import (
     Review,
     ReviewImage,
 )
-from order.models import Wishlist
+from order.services import WishlistService
+from api.uploads import ImageVariantsField, UploadedImageField
 
 from django.contrib.auth import get_user_model
 
@@ -16,19 +17,26 @@ from django.contrib.auth import get_user_model
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ["id", "name", "description", "product_count"]
+        fields = ["id", "name", "description", "product_count", "in_stock_count"]
 
     product_count = serializers.IntegerField(
         read_only=True, help_text="Number of products in this category"
     )
+    in_stock_count = serializers.IntegerField(
+        read_only=True, help_text="Number of products in this category in stock"
+    )
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField()
+    image = UploadedImageField()
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    variants = ImageVariantsField()
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "width", "height", "variants", "upload_status"]
+        read_only_fields = ["upload_status"]
 
 
 class ProductStockSerializer(serializers.ModelSerializer):
@@ -43,6 +51,7 @@ class ProductSerializer(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, required=False)
     is_in_wishlist = serializers.SerializerMethodField()
     stocks = ProductStockSerializer(many=True)
+    is_in_stock = serializers.BooleanField(source="in_stock", read_only=True)
 
     class Meta:
         model = Product
@@ -61,20 +70,37 @@ class ProductSerializer(serializers.ModelSerializer):
             "is_in_wishlist",
         ]
 
+    def get_wishlist_product_ids(self):
+        """Load the requesting user's wishlisted product ids once per serialization.
+
+        The ids are stored on the shared (root) context, so a list of products
+        resolves membership with a single query instead of one per row. Shared
+        (cached) responses leave it empty, see CatalogCacheMixin.
+        """
+        context = self.context
+        if "wishlist_product_ids" not in context:
+            request = context.get("request")
+            if request is None or context.get("shared_response"):
+                context["wishlist_product_ids"] = frozenset()
+            else:
+                context["wishlist_product_ids"] = WishlistService.get_product_ids(
+                    request.user
+                )
+        return context["wishlist_product_ids"]
+
     def get_is_in_wishlist(self, obj):
-        user = self.context.get("request").user if self.context.get("request") else None
-        if user and user.is_authenticated:
-            return Wishlist.objects.filter(user=user, products=obj).exists()
-        return False
+        return obj.pk in self.get_wishlist_product_ids()
 
     def create(self, validated_data):
         images_data = validated_data.pop("images", [])
         stocks_data = validated_data.pop("stocks", [])
         product = Product.objects.create(**validated_data)
-        for stock_data in stocks_data:
-            ProductStock.objects.create(product=product, **stock_data)
+        ProductStock.objects.bulk_create(
+            [ProductStock(product=product, **stock_data) for stock_data in stocks_data]
+        )
         for image_data in images_data:
             ProductImage.objects.create(product=product, **image_data)
+        product.refresh_from_db(fields=Product.STOCK_SUMMARY_FIELDS)
         return product
 
     def get_total_reviews(self, obj):
@@ -101,11 +127,15 @@ class SimpleUserSerializer(serializers.ModelSerializer):
 
 
 class ReviewImageSerializer(serializers.ModelSerializer):
-    image = serializers.ImageField()
+    image = UploadedImageField()
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
+    variants = ImageVariantsField()
 
     class Meta:
         model = ReviewImage
-        fields = ["id", "image"]
+        fields = ["id", "image", "width", "height", "variants", "upload_status"]
+        read_only_fields = ["upload_status"]
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from product.models import Product, Review
+
+
+class ReviewService:
+    """Keeps Product.review_count / rating_sum / rating_average in sync with reviews."""
+
+    AGGREGATE_FIELDS = ["review_count", "rating_sum", "rating_average"]
+
+    @staticmethod
+    def _apply(product_id, count_delta, rating_delta):
+        # ---> Lock the product row so concurrent review writes serialize on it
+        product = (
+            Product.objects.select_for_update()
+            .only(*ReviewService.AGGREGATE_FIELDS)
+            .get(pk=product_id)
+        )
+        product.apply_review_delta(count_delta, rating_delta)
+        product.save(update_fields=ReviewService.AGGREGATE_FIELDS)
+
+    @staticmethod
+    def create_review(serializer, **kwargs):
+        with transaction.atomic():
+            review = serializer.save(**kwargs)
+            ReviewService._apply(review.product_id, 1, review.rating)
+            return review
+
+    @staticmethod
+    def update_review(serializer, **kwargs):
+        with transaction.atomic():
+            old_rating = (
+                Review.objects.select_for_update()
+                .values_list("rating", flat=True)
+                .get(pk=serializer.instance.pk)
+            )
+            review = serializer.save(**kwargs)
+            if review.rating != old_rating:
+                ReviewService._apply(review.product_id, 0, review.rating - old_rating)
+            return review
+
+    @staticmethod
+    def delete_review(review):
+        with transaction.atomic():
+            product_id, rating = review.product_id, review.rating
+            review.delete()
+            ReviewService._apply(product_id, -1, -rating)
+
+    @staticmethod
+    def rebuild(product_ids=None, batch_size=1000):
+        """Recompute the aggregates from the Review table in set-based batches.
+
+        Returns the number of products updated.
+        """
+        reviews = (
+            Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+        )
+        count_sq = Subquery(reviews.annotate(c=Count("id")).values("c"))
+        sum_sq = Subquery(reviews.annotate(s=Sum("rating")).values("s"))
+        avg_sq = Subquery(reviews.annotate(a=Round(Avg("rating"), 1)).values("a"))
+        decimal = DecimalField(max_digits=12, decimal_places=1)
+
+        queryset = Product.objects.order_by("pk")
+        if product_ids is not None:
+            queryset = queryset.filter(pk__in=product_ids)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[
+                    :batch_size
+                ]
+            )
+            if not pks:
+                return updated
+            with transaction.atomic():
+                updated += Product.objects.filter(pk__in=pks).update(
+                    review_count=Coalesce(count_sq, 0),
+                    rating_sum=Coalesce(sum_sq, Value(0), output_field=decimal),
+                    rating_average=Coalesce(avg_sq, Value(0), output_field=decimal),
+                )
+            last_pk = pks[-1]
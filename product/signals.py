@@ -0,0 +1,101 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from product.caching import bump_catalog_version
+from product.models import (
+    Category,
+    Product,
+    ProductImage,
+    ProductStock,
+    Review,
+    ReviewImage,
+)
+from product.search import remove_from_search_index, update_search_index
+
+SEARCH_SOURCE_FIELDS = {"name", "description", "category", "category_id"}
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCH_SOURCE_FIELDS & set(update_fields):
+        return
+    update_search_index(product_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    remove_from_search_index(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and "name" not in update_fields):
+        return
+    update_search_index(category_id=instance.pk)
+
+
+@receiver(post_save, sender=ProductStock)
+@receiver(post_delete, sender=ProductStock)
+def refresh_stock_summary(sender, instance, raw=False, **kwargs):
+    # ---> Fixture loads (raw saves) keep the loaded timestamps
+    Product.objects.filter(pk=instance.product_id).refresh_stock_summary(touch=not raw)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductStock)
+@receiver(post_delete, sender=ProductStock)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def touch_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Product.objects.filter(pk=instance.product_id).touch()
+
+
+@receiver(post_save, sender=ReviewImage)
+@receiver(post_delete, sender=ReviewImage)
+def touch_reviewed_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Product.objects.filter(review__pk=instance.review_id).touch()
+
+
+CATEGORY_FIELDS = {"category", "category_id"}
+
+
+@receiver(post_save, sender=Product)
+def update_category_counts(
+    sender, instance, created, update_fields=None, raw=False, **kwargs
+):
+    # ---> Saves that can't have moved the product (e.g. the review aggregates
+    # ---> saved from a `.only()` instance) must not load the deferred category
+    if update_fields is not None and not CATEGORY_FIELDS & set(update_fields):
+        return
+    if "category_id" in instance.get_deferred_fields():
+        return
+    previous = getattr(instance, "_loaded_category_id", None)
+    if created or previous != instance.category_id:
+        Category.objects.filter(
+            pk__in={previous, instance.category_id} - {None}
+        ).refresh_product_counts(touch=not raw)
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Product)
+def decrement_category_counts(sender, instance, **kwargs):
+    Category.objects.filter(pk=instance.category_id).refresh_product_counts()
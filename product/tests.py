@@ -1,3 +1,500 @@
+import json
+import tempfile
+import time
+from unittest import skipUnless
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from product.bulk_load import LOADABLE_MODELS, CatalogLoader
+from product.caching import get_catalog_version
+from product.models import Category, Product, ProductStock, Review
+from product.search import FTS_TABLE, SEARCH_CONFIG
+from product.services import ReviewService
+from users.models import User
+
+
+class ProductPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Shirts")
+        Product.objects.bulk_create(
+            Product(name=f"Product {i:02d}", category=category) for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def names(self, response):
+        return [product["name"] for product in response.data["results"]]
+
+    def test_page_number_is_the_default(self):
+        first = self.client.get("/api/v1/products/")
+        third = self.client.get("/api/v1/products/", {"page": 3})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["count"], 25)
+        self.assertEqual(len(first.data["results"]), 10)
+        self.assertIn("page=2", first.data["next"])
+        self.assertEqual(len(third.data["results"]), 5)
+        self.assertTrue(set(self.names(first)).isdisjoint(self.names(third)))
+
+    def test_cursor_is_opt_in(self):
+        response = self.client.get(
+            "/api/v1/products/", {"pagination": "cursor", "page_size": 20}
+        )
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertIn("cursor=", response.data["next"])
+
+        following = self.client.get(response.data["next"])
+        self.assertEqual(len(following.data["results"]), 5)
+        self.assertIsNone(following.data["next"])
+        self.assertEqual(
+            len(set(self.names(response)) | set(self.names(following))), 25
+        )
+
+    def walk(self, params):
+        response = self.client.get("/api/v1/products/", params)
+        pages = [self.names(response)]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            pages.append(self.names(response))
+        return pages
+
+    def test_cursor_pages_are_stable_across_inserts(self):
+        category = Category.objects.get()
+        first = self.client.get(
+            "/api/v1/products/", {"pagination": "cursor", "page_size": 10}
+        )
+        Product.objects.bulk_create(
+            Product(name=f"New {i}", category=category) for i in range(5)
+        )
+
+        seen = self.names(first)
+        response = first
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            seen += self.names(response)
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(set(seen), {f"Product {i:02d}" for i in range(25)})
+
+    def test_equal_timestamps_are_ordered_by_the_primary_key(self):
+        Product.objects.update(created_at=timezone.now())
+
+        pages = self.walk({"pagination": "cursor", "page_size": 4, "count": "false"})
+
+        self.assertEqual(len(pages), 7)
+        self.assertEqual(
+            [name for page in pages for name in page],
+            [f"Product {i:02d}" for i in reversed(range(25))],
+        )
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(
+            "/api/v1/products/", {"pagination": "cursor", "page_size": 10}
+        )
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(self.names(back), self.names(first))
+        self.assertIsNotNone(back.data["next"])
+
+
+class ProductSearchTests(TestCase):
+    url = "/api/v1/products/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shirts = Category.objects.create(name="Shirts")
+        dresses = Category.objects.create(name="Dresses")
+        cls.polo = Product.objects.create(
+            name="Linen polo",
+            description="Breathable summer cotton",
+            category=cls.shirts,
+        )
+        cls.tee = Product.objects.create(
+            name="Cotton tee", description="Everyday basic", category=cls.shirts
+        )
+        cls.gown = Product.objects.create(
+            name="Evening gown",
+            description="Silk with a linen lining",
+            category=dresses,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def search(self, term):
+        cache.clear()
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [product["name"] for product in response.data["results"]]
+
+    def indexed(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name FROM {FTS_TABLE} WHERE rowid = %s", [product.pk]
+            )
+            return cursor.fetchone()
+
+    def test_terms_are_prefix_matched_across_fields(self):
+        self.assertEqual(self.search("polo"), ["Linen polo"])
+        self.assertEqual(self.search("breath"), ["Linen polo"])
+        self.assertCountEqual(self.search("dress"), ["Evening gown"])
+        self.assertCountEqual(self.search("shirt"), ["Linen polo", "Cotton tee"])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("cotton summer"), ["Linen polo"])
+        self.assertEqual(self.search("cotton silk"), [])
+        self.assertEqual(self.search("jacket"), [])
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search("cotton"), ["Cotton tee", "Linen polo"])
+        self.assertEqual(self.search("linen"), ["Linen polo", "Evening gown"])
+
+    def test_explicit_ordering_overrides_the_rank(self):
+        cache.clear()
+        response = self.client.get(
+            self.url, {"search": "cotton", "ordering": "created_at"}
+        )
+
+        self.assertEqual(
+            [product["name"] for product in response.data["results"]],
+            ["Linen polo", "Cotton tee"],
+        )
+
+    def test_renaming_a_product_reindexes_it(self):
+        self.tee.name = "Jersey top"
+        self.tee.save()
+
+        self.assertEqual(self.search("tee"), [])
+        self.assertEqual(self.search("jersey"), ["Jersey top"])
+
+    def test_renaming_a_category_reindexes_its_products(self):
+        self.shirts.name = "Tops"
+        self.shirts.save()
+
+        self.assertEqual(self.search("shirt"), [])
+        self.assertCountEqual(self.search("tops"), ["Linen polo", "Cotton tee"])
+
+    def test_deleted_products_drop_out_of_the_results(self):
+        self.polo.delete()
+
+        self.assertEqual(self.search("linen"), ["Evening gown"])
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 shadow table")
+    def test_delete_removes_the_fts_row(self):
+        self.assertEqual(self.indexed(self.polo), ("Linen polo",))
+
+        self.polo.delete()
+
+        self.assertIsNone(self.indexed(self.polo))
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector column")
+    def test_save_rebuilds_the_search_vector(self):
+        self.tee.name = "Jersey top"
+        self.tee.save()
+
+        product = Product.objects.filter(pk=self.tee.pk)
+        for term, indexed in (("tee", False), ("jersey", True)):
+            query = SearchQuery(term, config=SEARCH_CONFIG)
+            self.assertEqual(product.filter(search_vector=query).exists(), indexed)
+
+
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Shirts")
+        cls.product, cls.other = Product.objects.bulk_create(
+            Product(name=name, category=category) for name in ("Polo", "Tee")
+        )
+        ProductStock.objects.bulk_create(
+            ProductStock(product=product, size="M", price=100, stock=5)
+            for product in (cls.product, cls.other)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, product):
+        return self.client.get(f"/api/v1/products/{product.pk}/")
+
+    def test_stock_only_update_invalidates_only_that_product(self):
+        self.get(self.product)
+        self.get(self.other)
+        version = get_catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductStock.objects.filter(product=self.product).update(stock=3)
+
+        self.assertEqual(get_catalog_version(), version)
+        response = self.get(self.product)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["stocks"][0]["stock"], 3)
+        self.assertEqual(self.get(self.other)["X-Cache"], "HIT")
+
+    def test_selling_out_invalidates_the_catalog(self):
+        version = get_catalog_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductStock.objects.filter(product=self.product).update(stock=0)
+
+        self.assertNotEqual(get_catalog_version(), version)
+
+
+class ConditionalGetTests(TestCase):
+    url = "/api/v1/products/"
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Shirts")
+        cls.older, cls.newer = [
+            Product.objects.create(name=name, category=category)
+            for name in ("Polo", "Tee")
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def delete_older(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.older.pk).delete()
+
+    def test_list_revalidates_with_its_etag(self):
+        first = self.client.get(self.url)
+        etag = first["ETag"]
+
+        unchanged = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.delete_older()
+        deleted = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(deleted.status_code, 200)
+        self.assertNotEqual(deleted["ETag"], etag)
+        self.assertEqual(deleted.data["count"], 1)
+
+    def test_list_ignores_if_modified_since(self):
+        first = self.client.get(self.url)
+        since = http_date(time.time() + 60)
+
+        before = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+        self.delete_older()
+        after = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertNotIn("Last-Modified", first)
+        self.assertEqual(before.status_code, 200)
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.data["count"], 1)
+
+    def test_retrieve_revalidates_with_last_modified(self):
+        url = f"{self.url}{self.newer.pk}/"
+        first = self.client.get(url)
+        since = first["Last-Modified"]
+
+        unchanged = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(pk=self.newer.pk).update(
+                name="Tee", updated_at=timezone.now() + timedelta(minutes=1)
+            )
+        changed = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        by_etag = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(by_etag.status_code, 200)
+
+
+class ReviewAggregateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name="Polo", category=Category.objects.create(name="Shirts")
+        )
+        cls.users = [
+            User.objects.create_user(email=f"reviewer{i}@example.com") for i in range(2)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f"/api/v1/products/{self.product.pk}/reviews/"
+
+    def review(self, user, rating):
+        self.client.force_authenticate(user)
+        response = self.client.post(self.url, {"rating": rating, "comment": "Fits"})
+        self.assertEqual(response.status_code, 201)
+        return f"{self.url}{response.data['id']}/"
+
+    def aggregates(self):
+        return Product.objects.values_list(*ReviewService.AGGREGATE_FIELDS).get(
+            pk=self.product.pk
+        )
+
+    def test_review_writes_keep_the_aggregates_in_sync(self):
+        first = self.review(self.users[0], "4.0")
+        self.review(self.users[1], "5.0")
+        self.assertEqual(self.aggregates(), (2, Decimal("9.0"), Decimal("4.5")))
+
+        self.client.force_authenticate(self.users[0])
+        self.client.patch(first, {"rating": "2.0"})
+        self.assertEqual(self.aggregates(), (2, Decimal("7.0"), Decimal("3.5")))
+
+        self.client.delete(first)
+        after_delete = self.aggregates()
+        ReviewService.rebuild()
+
+        self.assertEqual(after_delete, (1, Decimal("5.0"), Decimal("5.0")))
+        self.assertEqual(self.aggregates(), after_delete)
+
+    def test_last_review_deleted_resets_the_rating(self):
+        review = self.review(self.users[0], "3.0")
+
+        self.client.delete(review)
+
+        self.assertEqual(self.aggregates(), (0, Decimal("0"), Decimal("0")))
+
+
+class CategoryCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Shirts")
+        cls.product = Product.objects.create(name="Polo", category=cls.category)
+        cls.user = User.objects.create_user(email="reviewer@example.com")
+
+    def test_review_aggregates_leave_the_category_alone(self):
+        updated_at = Category.objects.get(pk=self.category.pk).updated_at
+        with self.assertNumQueries(2):
+            ReviewService._apply(self.product.pk, 1, 4)
+        self.assertEqual(
+            Category.objects.get(pk=self.category.pk).updated_at, updated_at
+        )
+
+    def test_stock_summary_is_refreshed_in_batches(self):
+        products = Product.objects.bulk_create(
+            Product(name=f"Product {i}", category=self.category) for i in range(4)
+        )
+        ProductStock.objects.bulk_create(
+            ProductStock(product=product, size="M", price=100, stock=i % 2)
+            for i, product in enumerate(products)
+        )
+        Product.objects.update(in_stock=False, total_stock=0)
+        Category.objects.update(in_stock_count=0)
+
+        flipped = Product.objects.all().refresh_stock_summary(batch_size=2)
+
+        self.assertEqual(flipped, 2)
+        self.assertEqual(
+            list(Product.objects.order_by("pk").values_list("total_stock", flat=True)),
+            [0, 0, 1, 0, 1],
+        )
+        self.assertEqual(Category.objects.get(pk=self.category.pk).in_stock_count, 2)
+
+    def test_moving_a_product_recounts_both_categories(self):
+        other = Category.objects.create(name="Dresses")
+        self.product.category = other
+        self.product.save()
+
+        counts = dict(Category.objects.values_list("pk", "product_count"))
+        self.assertEqual(counts, {self.category.pk: 0, other.pk: 1})
+
+
+class CatalogLoaderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="reviewer@example.com")
+
+    def setUp(self):
+        records = [
+            {
+                "model": "product.category",
+                "pk": 1,
+                "fields": {"name": "Women", "updated_at": "2025-02-05T02:45:04Z"},
+            },
+            {
+                "model": "product.category",
+                "pk": 2,
+                "fields": {"name": "Men", "updated_at": "2025-02-06T02:45:04Z"},
+            },
+        ]
+        for pk in range(1, 5):
+            records.append(
+                {
+                    "model": "product.product",
+                    "pk": pk,
+                    "fields": {
+                        "name": f"Product {pk}",
+                        "category": pk % 2 + 1,
+                        "created_at": f"2025-03-0{pk}T10:00:00Z",
+                        "updated_at": f"2025-04-0{pk}T10:00:00Z",
+                    },
+                }
+            )
+        for pk, (product, size, stock) in enumerate(
+            [(1, "S", 3), (1, "M", 0), (2, "M", 0), (3, "L", 7)], start=1
+        ):
+            records.append(
+                {
+                    "model": "product.productstock",
+                    "pk": pk,
+                    "fields": {
+                        "product": product,
+                        "size": size,
+                        "price": 100 * pk,
+                        "stock": stock,
+                    },
+                }
+            )
+        records.append(
+            {
+                "model": "product.review",
+                "pk": 1,
+                "fields": {
+                    "product": 1,
+                    "user": self.user.pk,
+                    "rating": "4.0",
+                    "comment": "Nice",
+                    "created_at": "2025-05-01T10:00:00Z",
+                    "updated_at": "2025-05-02T10:00:00Z",
+                },
+            }
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "catalog.json")
+        Path(self.path).write_text(json.dumps(records), encoding="utf-8")
+
+    def snapshot(self):
+        return {
+            model._meta.label: [
+                {k: v for k, v in row.items() if k != "search_vector"}
+                for row in model._base_manager.order_by("pk").values()
+            ]
+            for model in LOADABLE_MODELS
+        }
+
+    def test_matches_loaddata(self):
+        call_command("loaddata", self.path, verbosity=0)
+        # ---> loaddata doesn't maintain the review aggregates
+        ReviewService.rebuild()
+        expected = self.snapshot()
+        Category.objects.all().delete()
+
+        CatalogLoader(chunk_size=2).load([self.path])
 
-# Create your tests here.
+        self.assertEqual(self.snapshot(), expected)
+        product = Product.objects.get(pk=1)
+        self.assertEqual(product.updated_at.isoformat(), "2025-04-01T10:00:00+00:00")
+        self.assertEqual((product.total_stock, product.review_count), (3, 1))
@@ -1,16 +1,21 @@
 from rest_framework import serializers
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 from api.permissions import IsAdminOrReadOnly
+from api.upload_handlers import ImageUploadMixin
 
 from product.permissions import IsReviewAuthorOrReadonly
-from product.paginations import DefaultPagination
+from product.paginations import CatalogPagination, DefaultPagination
 from product.filters import ProductFilter
+from product.search import ProductSearchFilter
+from product.caching import CatalogCacheMixin, ConditionalGetMixin
+from product.services import ReviewService
 from product.models import (
     Category,
     Product,
@@ -29,14 +34,14 @@ from product.serializers import (
 )
 
 
-from order.models import Wishlist
 from order.serializers import WishlistProductSerializer
+from order.services import WishlistService
 
-from django.db.models import Count
+from django.db.models import F
 
 
-class CategoryViewSet(ModelViewSet):
-    queryset = Category.objects.annotate(product_count=Count("products")).all()
+class CategoryViewSet(ConditionalGetMixin, CatalogCacheMixin, ModelViewSet):
+    queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
     permission_classes = [IsAdminOrReadOnly]
@@ -47,25 +52,31 @@ class EmptySerializer(serializers.Serializer):
         ref_name = "ProductEmptySerializer"
 
 
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CatalogCacheMixin, ModelViewSet):
     """
     API endpoint for managing products in the e-commerce store
      - Allows authenticated admin to create, update, and delete products
      - Allows users to browse and filter product
-     - Support searching by name, description, and category
-     - Support ordering by price and updated_at
+     - Support ranked full-text search by name, description, and category
+     - Support ordering by price, rating and created_at
+     - Page-number pagination (?page=N); pass ?pagination=cursor for keyset
+       (cursor) pagination, and ?count=false to skip its total count
     """
 
-    queryset = Product.objects.all()
+    queryset = (
+        Product.objects.defer("search_vector")
+        .prefetch_related("stocks", "images")
+        .annotate(price=F("min_price"), rating=F("rating_average"))
+    )
     serializer_class = ProductSerializer
 
-    pagination_class = DefaultPagination
+    pagination_class = CatalogPagination
     permission_classes = [IsAdminOrReadOnly]
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ["name", "description"]
-    ordering_fields = ["price"]
+    ordering_fields = ["price", "rating", "created_at"]
 
     def list(self, request, *args, **kwargs):
         """Retrive all the products"""
@@ -83,14 +94,15 @@ class ProductViewSet(ModelViewSet):
     )
     def add_to_wishlist(self, request, pk=None):
         """Add this product to the authenticated user's wishlist."""
-        product = self.get_object()
-        wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
-        if wishlist.products.filter(pk=product.pk).exists():
+        try:
+            added = WishlistService.add(request.user, self.get_product_id())
+        except Product.DoesNotExist:
+            raise NotFound
+        if not added:
             return Response(
                 {"success": False, "message": "Product already in wishlist."},
                 status=200,
             )
-        wishlist.products.add(product)
         return Response(
             {"success": True, "message": "Product added to wishlist."}, status=201
         )
@@ -103,24 +115,47 @@ class ProductViewSet(ModelViewSet):
     )
     def remove_from_wishlist(self, request, pk=None):
         """Remove this product from the authenticated user's wishlist."""
-        product = self.get_object()
-        wishlist, _ = Wishlist.objects.get_or_create(user=request.user)
-        if not wishlist.products.filter(pk=product.pk).exists():
+        product_id = self.get_product_id()
+        removed = WishlistService.remove(request.user, product_id)
+        if not removed:
+            if not Product.objects.filter(pk=product_id).exists():
+                raise NotFound
             return Response(
                 {"success": False, "message": "Product not in wishlist."}, status=200
             )
-        wishlist.products.remove(product)
         return Response(
             {"success": True, "message": "Product removed from wishlist."}, status=200
         )
 
+    def get_product_id(self):
+        """The product id from the URL, without loading the product."""
+        try:
+            return int(self.kwargs["pk"])
+        except ValueError:
+            raise NotFound
+
+    def get_etag_extra(self, request):
+        return tuple(sorted(WishlistService.get_product_ids(request.user)))
+
+    def get_cached_product_ids(self, data):
+        products = data["results"] if "results" in data else [data]
+        return [product["id"] for product in products]
+
+    def personalize_response(self, request, data):
+        """Fill in the per-user is_in_wishlist flag on a shared cached body."""
+        wishlist_ids = WishlistService.get_product_ids(request.user)
+        products = data["results"] if "results" in data else [data]
+        for product in products:
+            product["is_in_wishlist"] = product["id"] in wishlist_ids
+        return data
+
     def get_wishlist_response(self, wishlist):
         products = wishlist.products.all()
         serializer = WishlistProductSerializer(products, many=True)
         return Response(serializer.data)
 
 
-class ProductImageViewSet(ModelViewSet):
+class ProductImageViewSet(ImageUploadMixin, CatalogCacheMixin, ModelViewSet):
     serializer_class = ProductImageSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -131,7 +166,7 @@ class ProductImageViewSet(ModelViewSet):
         serializer.save(product_id=self.kwargs.get("product_pk"))
 
 
-class ProductStockViewSet(ModelViewSet):
+class ProductStockViewSet(CatalogCacheMixin, ModelViewSet):
     serializer_class = ProductStockSerializer
     permission_classes = [IsAdminOrReadOnly]
 
@@ -142,21 +177,38 @@ class ProductStockViewSet(ModelViewSet):
         serializer.save(product_id=self.kwargs.get("product_pk"))
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(CatalogCacheMixin, ModelViewSet):
+    """Reviews of a product, newest first and page-number paginated."""
+
     serializer_class = ReviewSerializer
+    pagination_class = DefaultPagination
     permission_classes = [IsReviewAuthorOrReadonly]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        ReviewService.create_review(serializer, user=self.request.user)
+
+    def perform_update(self, serializer):
+        ReviewService.update_review(serializer)
+
+    def perform_destroy(self, instance):
+        ReviewService.delete_review(instance)
 
     def get_queryset(self):
-        return Review.objects.filter(product_id=self.kwargs.get("product_pk"))
+        return (
+            Review.objects.filter(product_id=self.kwargs.get("product_pk"))
+            .select_related("user")
+            .prefetch_related("images")
+            .order_by("-created_at", "-pk")
+        )
 
     def get_serializer_context(self):
-        return {"product_id": self.kwargs.get("product_pk")}
+        context = {"product_id": self.kwargs.get("product_pk")}
+        if self.shared_response:
+            context["shared_response"] = True
+        return context
 
 
-class ReviewImageViewSet(ModelViewSet):
+class ReviewImageViewSet(ImageUploadMixin, CatalogCacheMixin, ModelViewSet):
     serializer_class = ReviewImageSerializer
     permission_classes = [IsReviewAuthorOrReadonly]
 
@@ -1,7 +1,22 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
 
+from api.authentication import USER_STATE_FIELDS, invalidate_user_state
 
-class CustomUserManager(BaseUserManager):
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # ---> Bulk updates skip post_save (users.signals); drop the cached
+        #      auth state of the users they change by hand
+        user_ids = []
+        if set(kwargs) & set(USER_STATE_FIELDS):
+            user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        invalidate_user_state(*user_ids)
+        return rows
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError("This Email field must be set")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_pending_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
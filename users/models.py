@@ -3,10 +3,11 @@ from django.contrib.auth.models import AbstractUser
 from users.managers import CustomUserManager
 
 from cloudinary.models import CloudinaryField
+from api.models import PendingUpload
 from product.validators import validate_file_size
 
 
-class User(AbstractUser):
+class User(AbstractUser, PendingUpload):
     username = None
     email = models.EmailField(unique=True)
     profile_picture = CloudinaryField(
@@ -19,6 +20,8 @@ class User(AbstractUser):
     address = models.TextField(blank=True, null=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True)
 
+    upload_field = "profile_picture"
+
     USERNAME_FIELD = "email"  # ---> Use email instead of username
     REQUIRED_FIELDS = []
 
@@ -26,3 +29,11 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # ---> request.user comes with most columns deferred
+        #      (api.authentication); load them in one query on first access
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using, fields, from_queryset)
@@ -3,6 +3,12 @@ from djoser.serializers import (
     UserSerializer as BaseUserSerializer,
 )
 
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+
+from api.uploads import UploadedImageField
+
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     """Serializer for user registration"""
@@ -22,6 +28,8 @@ class UserCreateSerializer(BaseUserCreateSerializer):
 class UserSerializer(BaseUserSerializer):
     """Complete user serializer for authenticated users"""
 
+    profile_picture = UploadedImageField(required=False, allow_null=True)
+
     class Meta(BaseUserSerializer.Meta):
         ref_name = "CustomUser"
         fields = (
@@ -35,3 +43,14 @@ class UserSerializer(BaseUserSerializer):
             "is_staff",
         )
         read_only_fields = ("id", "email", "password", "is_staff")
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Adds the user's auth state to the token claims."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["is_active"] = user.is_active
+        token["is_staff"] = user.is_staff
+        return token
@@ -1,3 +1,58 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+
+class CachedAuthStateTests(TestCase):
+    url = "/api/v1/orders/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="shopper@example.com")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"JWT {AccessToken.for_user(self.user)}"
+        )
+
+    def test_deactivation_applies_on_the_next_request(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_bulk_deactivation_applies_on_the_next_request(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=5)
+    def test_state_changed_behind_the_orm_expires_with_the_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {User._meta.db_table} SET is_active = %s WHERE id = %s",
+                [False, self.user.pk],
+            )
+
+        stale = self.client.get(self.url)
+        with mock.patch(
+            "django.core.cache.backends.locmem.time",
+            **{"time.return_value": time.time() + 6},
+        ):
+            expired = self.client.get(self.url)
+
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(expired.status_code, 401)